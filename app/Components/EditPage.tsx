@@ -39,7 +39,8 @@ const EditPage: React.FC<EditPageProps> = ({
         
         setEditedEvents(prevEvents => {
             const newEvents = prevEvents.map(event => 
-                event.id === updatedEvent.id ? updatedEvent : event
+                // Merge so fields the bubble doesn't edit (like sourceBbox) survive the update
+                event.id === updatedEvent.id ? { ...event, ...updatedEvent } : event
             );
             console.log('EditPage: Updated editedEvents state:', newEvents);
             return newEvents;
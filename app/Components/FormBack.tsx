@@ -14,6 +14,8 @@ export interface EventType {
     description?: string;
     allDay?: boolean;
     url?: string;
+    // [min_x, max_x, min_y, max_y] in the uploaded image, for region re-OCR
+    sourceBbox?: number[] | null;
 }
 
 const FormBack = () => {
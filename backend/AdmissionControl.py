@@ -0,0 +1,321 @@
+import hashlib
+import math
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import g, jsonify, request
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Token cost of one request per endpoint; OCR is what burns Vision quota and worker time.
+# Uploads are charged like a download up front and pay OCR_COST on top only if they
+# actually go to Vision (not when they share another upload's result or hit the cache).
+DEFAULT_ENDPOINT_COSTS = {
+    'convert_picture_to_ics': 1.0,
+    'reocr_region': 5.0,
+    'freebusy': 2.0,
+    'update_events': 1.0,
+    'redate': 1.0,
+    'downloadICS': 1.0,
+    'shareICS': 1.0,
+    'calendarFeed': 0.25,
+}
+OCR_COST = 9.0
+# Endpoints that always call Vision and take an in-flight slot up front;
+# convert-schedule takes one through ocr_admission() only when it calls Vision
+OCR_ENDPOINTS = {'reocr_region'}
+
+
+class AdmissionRejected(Exception):
+    """Raised from inside a request that turns out to need more than before_request admitted."""
+
+    def __init__(self, reason, retry_after, message, client_key):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.message = message
+        self.client_key = client_key
+
+
+class InMemoryBucketStore:
+    """Token buckets and concurrency slots for a single worker process."""
+
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        # Least recently used first, so evicting the oldest client is O(1) under the lock
+        self._buckets = OrderedDict()
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, cost, rate, capacity):
+        """Takes cost tokens from key's bucket. Returns (allowed, seconds until it would be allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate
+            self._buckets.move_to_end(key)
+
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def acquire_slot(self, name, limit):
+        with self._lock:
+            in_use = self._slots.get(name, 0)
+            if in_use >= limit:
+                return None
+            self._slots[name] = in_use + 1
+            return name
+
+    def release_slot(self, name, token):
+        with self._lock:
+            self._slots[name] = max(0, self._slots.get(name, 0) - 1)
+
+
+class RedisBucketStore:
+    """Token buckets and concurrency slots shared by every worker through Redis.
+
+    If Redis can't be reached the store falls back to per-process buckets and
+    slots, so an outage loosens the limits rather than failing requests. Redis is
+    only tried again every `retry_interval` seconds, so requests during an outage
+    don't each wait out the connection timeout.
+    """
+
+    # KEYS[1]=bucket  ARGV: rate, capacity, cost, now
+    CONSUME_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    # KEYS[1]=slot set  ARGV: token, limit, now, lease seconds
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[3])
+    -- Slots held by a crashed worker expire instead of leaking forever
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[4]))
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[1])
+    return 1
+    """
+
+    LOCAL_TOKEN_PREFIX = 'local:'
+
+    def __init__(self, url=None, prefix='snap:admission:', slot_lease=300, client=None, retry_interval=5.0):
+        if redis is None:
+            raise RuntimeError("ADMISSION_REDIS_URL is set but the 'redis' package is not installed.")
+        self.client = client if client is not None else redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.slot_lease = slot_lease
+        self.fallback = InMemoryBucketStore()
+        self.retry_interval = retry_interval
+        self.degraded = False
+        self._failed_at = None
+        self._consume = self.client.register_script(self.CONSUME_SCRIPT)
+        self._acquire = self.client.register_script(self.ACQUIRE_SCRIPT)
+
+    def _skip_redis(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval
+
+    def _unavailable(self, e):
+        if not self.degraded:
+            logging.warning(f"Admission Redis unavailable ({e}); limiting per process until it is back")
+        self.degraded = True
+        self._failed_at = time.monotonic()
+
+    def _available(self):
+        if self.degraded:
+            logging.info("Admission Redis reachable again; back to shared limits")
+        self.degraded = False
+        self._failed_at = None
+
+    def consume(self, key, cost, rate, capacity):
+        if self._skip_redis():
+            return self.fallback.consume(key, cost, rate, capacity)
+        try:
+            allowed, retry_after = self._consume(keys=[self.prefix + 'bucket:' + key],
+                                                 args=[rate, capacity, cost, time.time()])
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            self._unavailable(e)
+            return self.fallback.consume(key, cost, rate, capacity)
+        self._available()
+        return bool(allowed), float(retry_after)
+
+    def _acquire_local_slot(self, name, limit):
+        local = self.fallback.acquire_slot(name, limit)
+        return self.LOCAL_TOKEN_PREFIX + local if local is not None else None
+
+    def acquire_slot(self, name, limit):
+        if self._skip_redis():
+            return self._acquire_local_slot(name, limit)
+        token = uuid.uuid4().hex
+        try:
+            acquired = self._acquire(keys=[self.prefix + 'slots:' + name],
+                                     args=[token, limit, time.time(), self.slot_lease])
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            self._unavailable(e)
+            return self._acquire_local_slot(name, limit)
+        self._available()
+        return token if acquired else None
+
+    def release_slot(self, name, token):
+        # A slot taken during an outage lives in the fallback even if Redis has come back since
+        if token.startswith(self.LOCAL_TOKEN_PREFIX):
+            self.fallback.release_slot(name, token[len(self.LOCAL_TOKEN_PREFIX):])
+            return
+        try:
+            self.client.zrem(self.prefix + 'slots:' + name, token)
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            # The slot lease expires it once Redis is back
+            self._unavailable(e)
+
+
+class AdmissionController:
+    """Per-client token-bucket rate limiting weighted by endpoint and upload size.
+
+    Every client (API key if sent, otherwise IP) has a bucket that refills at
+    `rate` tokens per second up to `capacity`. A request costs its endpoint's
+    base cost plus `cost_per_mb` for every megabyte uploaded. OCR endpoints also
+    need one of `ocr_concurrency` global in-flight slots. Rejected requests get
+    a 429 with Retry-After.
+    """
+
+    def __init__(self, store, rate=0.5, capacity=40.0, endpoint_costs=None, cost_per_mb=2.0,
+                 ocr_concurrency=16, trust_proxy=False, ocr_cost=OCR_COST):
+        self.store = store
+        self.rate = rate
+        self.capacity = capacity
+        self.endpoint_costs = dict(DEFAULT_ENDPOINT_COSTS, **(endpoint_costs or {}))
+        self.cost_per_mb = cost_per_mb
+        self.ocr_cost = ocr_cost
+        self.ocr_concurrency = ocr_concurrency
+        self.trust_proxy = trust_proxy
+        self.rejections = {'rate': 0, 'concurrency': 0}
+        logging.info(f"AdmissionController initialized ({type(store).__name__}, rate={rate}/s, "
+                     f"capacity={capacity}, ocr_concurrency={ocr_concurrency}).")
+
+    @classmethod
+    def from_env(cls):
+        """Builds the controller from ADMISSION_* environment variables, or returns None if disabled."""
+        if os.environ.get('ADMISSION_ENABLED', '1') == '0':
+            logging.info("Admission control disabled.")
+            return None
+        redis_url = os.environ.get('ADMISSION_REDIS_URL')
+        store = RedisBucketStore(redis_url) if redis_url else InMemoryBucketStore()
+        return cls(
+            store,
+            rate=float(os.environ.get('ADMISSION_RATE', 0.5)),
+            capacity=float(os.environ.get('ADMISSION_BURST', 40)),
+            cost_per_mb=float(os.environ.get('ADMISSION_COST_PER_MB', 2.0)),
+            ocr_concurrency=int(os.environ.get('ADMISSION_OCR_CONCURRENCY', 16)),
+            trust_proxy=os.environ.get('ADMISSION_TRUST_PROXY') == '1',
+        )
+
+    def client_key(self):
+        api_key = request.headers.get('X-API-Key')
+        if api_key:
+            # Never keep raw keys in the bucket store
+            return 'key:' + hashlib.sha256(api_key.encode()).hexdigest()[:32]
+        if self.trust_proxy and request.access_route:
+            return 'ip:' + request.access_route[0]
+        return 'ip:' + (request.remote_addr or 'unknown')
+
+    def cost(self):
+        cost = self.endpoint_costs.get(request.endpoint, 1.0)
+        if request.content_length:
+            cost += self.cost_per_mb * request.content_length / (1024 * 1024)
+        # A request costing more than a full bucket could never be admitted
+        return min(cost, self.capacity)
+
+    def _reject(self, reason, retry_after, message):
+        self.rejections[reason] += 1
+        return self.rejection_response(AdmissionRejected(reason, retry_after, message, None))
+
+    def rejection_response(self, rejected):
+        response = jsonify({"error": rejected.message})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(rejected.retry_after)))
+        return response
+
+    def before_request(self):
+        if request.method == 'OPTIONS' or request.endpoint in (None, 'static', 'ready') or request.path.startswith('/admin/'):
+            return None
+
+        key = self.client_key()
+        cost = self.cost()
+
+        # Take the slot before charging, so a request turned away for concurrency costs the client nothing
+        token = None
+        if request.endpoint in OCR_ENDPOINTS:
+            token = self.store.acquire_slot('ocr', self.ocr_concurrency)
+            if token is None:
+                logging.warning(f"OCR concurrency cap of {self.ocr_concurrency} reached; rejecting {key}")
+                return self._reject('concurrency', 1, "The server is busy processing other schedules, please retry shortly.")
+
+        allowed, retry_after = self.store.consume(key, cost, self.rate, self.capacity)
+        if not allowed:
+            if token is not None:
+                self.store.release_slot('ocr', token)
+            logging.warning(f"Rate limited {key} on {request.endpoint} (cost {cost:.1f}, retry in {retry_after:.1f}s)")
+            return self._reject('rate', retry_after, "Too many requests, please slow down.")
+
+        if token is not None:
+            g.admission_slot = token
+        return None
+
+    @contextmanager
+    def ocr_admission(self):
+        """Holds an OCR slot and charges OCR_COST for a Vision call made inside the block.
+
+        Raises AdmissionRejected (slot first, so a busy server costs the client nothing).
+        """
+        key = self.client_key()
+        token = self.store.acquire_slot('ocr', self.ocr_concurrency)
+        if token is None:
+            self.rejections['concurrency'] += 1
+            logging.warning(f"OCR concurrency cap of {self.ocr_concurrency} reached; rejecting {key}")
+            raise AdmissionRejected('concurrency', 1, "The server is busy processing other schedules, please retry shortly.", key)
+        try:
+            allowed, retry_after = self.store.consume(key, min(self.ocr_cost, self.capacity), self.rate, self.capacity)
+            if not allowed:
+                self.rejections['rate'] += 1
+                logging.warning(f"Rate limited {key} on OCR (cost {self.ocr_cost:.1f}, retry in {retry_after:.1f}s)")
+                raise AdmissionRejected('rate', retry_after, "Too many requests, please slow down.", key)
+            yield
+        finally:
+            self.store.release_slot('ocr', token)
+
+    def teardown_request(self, exc=None):
+        token = g.pop('admission_slot', None)
+        if token is not None:
+            self.store.release_slot('ocr', token)
@@ -0,0 +1,135 @@
+import gzip
+import json
+import zlib
+import logging
+from datetime import date, datetime, time
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth the CPU to compress
+COMPRESSION_THRESHOLD = 1024
+# Arrays longer than this are streamed in chunks instead of encoded in one go
+STREAM_THRESHOLD = 1000
+STREAM_CHUNK_SIZE = 200
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Encodes a payload as JSON bytes; datetimes are written in ISO format."""
+    if orjson is not None:
+        # orjson serializes datetimes natively, matching isoformat() output
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+def negotiate_encoding():
+    """Picks the best content coding the client accepts, preferring brotli."""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress(body: bytes, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def _finish(response, body, encoding):
+    if encoding and len(body) >= COMPRESSION_THRESHOLD:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response.set_data(body)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def json_response(payload, status=200) -> Response:
+    """Fast-encoded JSON response, compressed when the client accepts it and it's large enough."""
+    response = Response(status=status, mimetype='application/json')
+    return _finish(response, dumps(payload), negotiate_encoding())
+
+
+def file_response(body: bytes, mimetype, download_name) -> Response:
+    """Attachment response with the same negotiated compression as json_response."""
+    response = Response(mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    return _finish(response, body, negotiate_encoding())
+
+
+class _StreamCompressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=5)
+        elif encoding == 'gzip':
+            # wbits=31 writes a gzip header and trailer around the deflate stream
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            self._compressor = None
+
+    def compress(self, chunk):
+        if self._compressor is None:
+            return chunk
+        if self.encoding == 'br':
+            return self._compressor.process(chunk)
+        return self._compressor.compress(chunk)
+
+    def finish(self):
+        if self._compressor is None:
+            return b''
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def json_array_response(payload, array_key, items, status=200) -> Response:
+    """Like json_response, but streams payload[array_key] in chunks when it is large.
+
+    Small arrays go through json_response unchanged. Large ones are written as the
+    surrounding object followed by the array, one chunk at a time, so the whole
+    document is never held in memory as a single string.
+    """
+    if len(items) < STREAM_THRESHOLD:
+        return json_response(dict(payload, **{array_key: items}), status)
+
+    encoding = negotiate_encoding()
+    head = dumps(payload)
+    # Re-open the encoded object so the array can be appended as its last member
+    prefix = head[:-1] + (b',' if len(head) > 2 else b'') + dumps(array_key) + b':['
+
+    def generate():
+        compressor = _StreamCompressor(encoding)
+        yield compressor.compress(prefix)
+        for offset in range(0, len(items), STREAM_CHUNK_SIZE):
+            # Each chunk encodes as "[a,b,c]"; strip the brackets and join with commas
+            chunk = dumps(items[offset:offset + STREAM_CHUNK_SIZE])[1:-1]
+            if offset:
+                chunk = b',' + chunk
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.compress(b']}') + compressor.finish()
+
+    logging.info(f"Streaming {len(items)} '{array_key}' items (encoding={encoding})")
+    response = Response(generate(), status=status, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
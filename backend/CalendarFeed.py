@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import Response
+
+class CalendarFeed:
+    """Serves subscribable calendar feeds with a render cache and HTTP validators.
+
+    Each feed token points at a session. The calendar is rendered lazily the first
+    time the feed is polled and kept, together with a pre-compressed copy, until the
+    token is pointed at a different session or falls out of the `max_entries`
+    least-recently-polled feeds. Polls that present a matching ETag or
+    Last-Modified get an empty 304, so hourly polling stays a dict lookup.
+
+    Feeds, like the sessions behind them, live in this process's memory. Calendar
+    apps poll from wherever they like, so sticky routing can't keep them on one
+    worker: run a single worker (WEB_CONCURRENCY=1) if feeds are shared.
+    """
+
+    def __init__(self, render_session, max_age=3600, max_entries=1024):
+        # render_session(session_id) -> ICS text for that session
+        self.render_session = render_session
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        # _lock only guards the dicts; renders take their token's own lock so
+        # first polls of different feeds don't queue behind each other
+        self._lock = threading.Lock()
+        self._render_locks = OrderedDict()
+        self.evictions = 0
+        logging.info(f"CalendarFeed initialized (max_entries={max_entries}).")
+
+    def invalidate(self, token):
+        with self._lock:
+            self._cache.pop(token, None)
+
+    def _render_lock(self, token):
+        with self._lock:
+            lock = self._render_locks.setdefault(token, threading.Lock())
+            self._render_locks.move_to_end(token)
+            # Dropping a lock that is still held only risks one duplicate render
+            while len(self._render_locks) > self.max_entries:
+                self._render_locks.popitem(last=False)
+            return lock
+
+    def _cached(self, token, session_id):
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry and entry['session_id'] == session_id:
+                self._cache.move_to_end(token)
+                return entry
+            return None
+
+    def _get_entry(self, token, session_id):
+        entry = self._cached(token, session_id)
+        if entry:
+            return entry
+
+        with self._render_lock(token):
+            # Another thread may have rendered it while we waited for the lock
+            entry = self._cached(token, session_id)
+            if entry:
+                return entry
+
+            body = self.render_session(session_id).encode('utf-8')
+            entry = {
+                'session_id': session_id,
+                'body': body,
+                'gzip_body': gzip.compress(body, compresslevel=6, mtime=0),
+                'etag': hashlib.sha1(body).hexdigest(),
+                # HTTP dates only have second precision
+                'last_modified': datetime.now(timezone.utc).replace(microsecond=0),
+            }
+            with self._lock:
+                self._cache[token] = entry
+                self._cache.move_to_end(token)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+            logging.info(f"Rendered calendar feed {token} for session {session_id} ({len(body)} bytes)")
+            return entry
+
+    def make_response(self, token, session_id, request) -> Response:
+        entry = self._get_entry(token, session_id)
+
+        if self._is_not_modified(entry, request):
+            response = Response(status=304)
+        else:
+            use_gzip = 'gzip' in request.accept_encodings
+            response = Response(entry['gzip_body'] if use_gzip else entry['body'], mimetype='text/calendar')
+            response.charset = 'utf-8'
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+
+        # Weak: the gzip and identity bodies differ byte-for-byte but carry the same calendar
+        response.set_etag(entry['etag'], weak=True)
+        response.last_modified = entry['last_modified']
+        response.headers['Cache-Control'] = f"public, max-age={self.max_age}"
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    def _is_not_modified(self, entry, request):
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(entry['etag'])
+        if request.if_modified_since:
+            return entry['last_modified'] <= request.if_modified_since
+        return False
@@ -1,4 +1,5 @@
 from ics import Calendar, Event as IcsEvent
+import hashlib
 import logging
 import re
 from datetime import timedelta
@@ -8,7 +9,9 @@ class ICSExporter:
         logging.info("ICSExporter initialized.")
         self.calendar = Calendar()
     
-    def generate_ics(self, events):
+    def generate_ics(self, events, stable_uids=False):
+        # stable_uids derives each UID from the event itself so subscribed calendar
+        # clients see the same event across re-renders instead of delete + re-add
         self.calendar = Calendar()  # Create a fresh calendar
     
         #edge cases: if no events passed through the parameter
@@ -16,6 +19,10 @@ class ICSExporter:
             logging.warning("No events provided to ICSExporter. Generating empty calendar.")
             return self.calendar.serialize()
 
+        # Identical events (e.g. a class entered twice) would share a UID and be merged by
+        # Calendar.events, so each repeat of the same key gets its own occurrence number
+        uid_occurrences = {}
+
         for event in events:
             try:
                 # Ensure end time is after start time
@@ -24,7 +31,13 @@ class ICSExporter:
                     event.end_time = event.start_time + timedelta(hours=1)
             
                 # Create a new ICS event
-                ics_event = IcsEvent()
+                uid = None
+                if stable_uids:
+                    key = self._uid_key(event)
+                    occurrence = uid_occurrences.get(key, 0)
+                    uid_occurrences[key] = occurrence + 1
+                    uid = self._stable_uid(key, occurrence)
+                ics_event = IcsEvent(uid=uid)
                 
                 # Set basic properties with sanitization
                 ics_event.name = self._sanitize_name(event.name)
@@ -52,6 +65,15 @@ class ICSExporter:
         logging.info(f"Generated ICS content of length {len(ics_content)}.")
         return ics_content
     
+    def _uid_key(self, event):
+        return f"{event.name}|{event.start_time.isoformat()}|{event.end_time.isoformat()}|{event.location or ''}"
+
+    def _stable_uid(self, key, occurrence=0):
+        # The first occurrence keeps the plain key so existing subscriptions keep their UIDs
+        if occurrence:
+            key = f"{key}|{occurrence}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + "@snap-scheduli"
+
     def _sanitize_name(self, name):
         """Clean up event names that might cause issues with ICS format"""
         if not name:
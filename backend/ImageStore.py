@@ -0,0 +1,45 @@
+import threading
+import logging
+from collections import OrderedDict
+
+class ImageStore:
+    """Least-recently-used store of uploaded image bytes keyed by image hash, capped by total size.
+
+    Sessions keep only the hash, so many sessions of the same upload share one copy
+    and old uploads are dropped instead of staying in memory for the life of the process.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        logging.info(f"ImageStore initialized (max_bytes={max_bytes}).")
+
+    def put(self, image_hash, content: bytes):
+        if len(content) > self.max_bytes:
+            logging.warning(f"Image {image_hash[:16]} ({len(content)} bytes) is larger than the whole store; not kept")
+            return
+        with self._lock:
+            previous = self._images.pop(image_hash, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._images[image_hash] = content
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def get(self, image_hash):
+        """Returns the image bytes, or None if they were never stored or have been evicted."""
+        with self._lock:
+            content = self._images.get(image_hash)
+            if content is not None:
+                self._images.move_to_end(image_hash)
+            return content
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {'images': len(self._images), 'bytes': self._size, 'evictions': self.evictions}
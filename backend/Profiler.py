@@ -0,0 +1,237 @@
+import cProfile
+import heapq
+import io
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from flask import g, request
+
+class RuntimeProfiler:
+    """On-demand memory, CPU and slow-request profiling for the running server.
+
+    Every capture is off by default. While off, the request hooks and stage()
+    only check a couple of booleans, so the profiler can stay compiled in.
+    """
+
+    # Values accepted by tracemalloc's Snapshot.compare_to() and pstats' sort_stats()
+    MEMORY_GROUPINGS = ('filename', 'lineno', 'traceback')
+    CPU_SORT_KEYS = tuple(sorted(pstats.Stats.sort_arg_dict_default))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # tracemalloc
+        self._memory_baseline = None
+        # CPU sampling window
+        self.cpu_active = False
+        self._cpu_stats = None
+        self._cpu_deadline = None
+        self._cpu_remaining = None
+        self._cpu_requests = 0
+        self._cpu_skipped = 0
+        # Slowest requests
+        self.slow_active = False
+        self._slow_keep = 20
+        self._slow_threshold = 0.0
+        self._slow_heap = []
+        self._slow_counter = 0
+        logging.info("RuntimeProfiler initialized.")
+
+    # ---- Memory -----------------------------------------------------------------
+
+    def start_memory(self, frames=10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._memory_baseline = self._snapshot()
+        logging.info(f"tracemalloc started with {frames} frames")
+
+    def stop_memory(self):
+        tracemalloc.stop()
+        self._memory_baseline = None
+        logging.info("tracemalloc stopped")
+
+    def _snapshot(self):
+        # Both sides of a diff need the same filters, or filtered frames show up as freed
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def memory_report(self, limit=20, group_by='lineno', reset_baseline=False) -> dict:
+        """Top allocation growth since the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            return {'tracing': False}
+
+        snapshot = self._snapshot()
+        if self._memory_baseline is None:
+            # Tracing was started outside start_memory() (e.g. PYTHONTRACEMALLOC); growth counts from now
+            logging.info("tracemalloc was already tracing without a baseline; taking one now")
+            self._memory_baseline = snapshot
+        diff = snapshot.compare_to(self._memory_baseline, group_by)
+        current, peak = tracemalloc.get_traced_memory()
+        if reset_baseline:
+            self._memory_baseline = snapshot
+
+        return {
+            'tracing': True,
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top_growth': [
+                {
+                    'location': str(stat.traceback),
+                    'size_bytes': stat.size,
+                    'size_diff_bytes': stat.size_diff,
+                    'count': stat.count,
+                    'count_diff': stat.count_diff,
+                }
+                for stat in diff[:limit]
+            ],
+        }
+
+    # ---- CPU --------------------------------------------------------------------
+
+    def start_cpu(self, seconds=30.0, max_requests=None):
+        """Profiles every request until the window closes (time or request count)."""
+        with self._lock:
+            self._cpu_stats = None
+            self._cpu_requests = 0
+            self._cpu_skipped = 0
+            self._cpu_deadline = time.monotonic() + seconds if seconds else None
+            self._cpu_remaining = max_requests
+            self.cpu_active = True
+        logging.info(f"CPU profiling window opened (seconds={seconds}, requests={max_requests})")
+
+    def stop_cpu(self):
+        self.cpu_active = False
+
+    def cpu_report(self, limit=30, sort='cumulative') -> str:
+        with self._lock:
+            if self._cpu_stats is None:
+                return f"No profiled requests yet (active={self.cpu_active}).\n"
+            out = io.StringIO()
+            out.write(f"{self._cpu_requests} requests profiled, {self._cpu_skipped} skipped, active={self.cpu_active}\n")
+            self._cpu_stats.stream = out
+            self._cpu_stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+    def _cpu_window_open(self):
+        if self._cpu_deadline is not None and time.monotonic() > self._cpu_deadline:
+            self.cpu_active = False
+        if self._cpu_remaining is not None and self._cpu_remaining <= 0:
+            self.cpu_active = False
+        return self.cpu_active
+
+    # ---- Slow requests ----------------------------------------------------------
+
+    def start_slow(self, keep=20, threshold_ms=0.0):
+        with self._lock:
+            self._slow_keep = keep
+            self._slow_threshold = threshold_ms / 1000
+            self._slow_heap = []
+            self.slow_active = True
+        logging.info(f"Slow-request capture started (keep={keep}, threshold={threshold_ms}ms)")
+
+    def stop_slow(self):
+        self.slow_active = False
+
+    def slow_report(self) -> list:
+        with self._lock:
+            entries = [entry for _, _, entry in self._slow_heap]
+        return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
+
+    @property
+    def capturing(self):
+        return self.slow_active
+
+    def stage(self, name):
+        """Times a named stage of the current request when slow-request capture is on."""
+        if not self.slow_active or 'profile_stages' not in g:
+            return nullcontext()
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            g.profile_stages[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def tag(self, **tags):
+        """Attaches tags (e.g. image hash, word count) to the current request's capture."""
+        if self.slow_active and 'profile_tags' in g:
+            g.profile_tags.update(tags)
+
+    # ---- Request hooks ----------------------------------------------------------
+
+    def before_request(self):
+        if not (self.cpu_active or self.slow_active) or request.path.startswith('/admin/'):
+            return
+
+        if self.slow_active:
+            g.profile_started = time.perf_counter()
+            g.profile_stages = {}
+            g.profile_tags = {}
+
+        if self.cpu_active and self._cpu_window_open():
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Only one profiler may be active at a time on newer Pythons; skip overlapping requests
+                with self._lock:
+                    self._cpu_skipped += 1
+                return
+            g.cpu_profile = profile
+
+    def after_request(self, response):
+        profile = g.pop('cpu_profile', None)
+        if profile is not None:
+            profile.disable()
+            with self._lock:
+                if self._cpu_stats is None:
+                    self._cpu_stats = pstats.Stats(profile)
+                else:
+                    self._cpu_stats.add(profile)
+                self._cpu_requests += 1
+                if self._cpu_remaining is not None:
+                    self._cpu_remaining -= 1
+
+        started = g.pop('profile_started', None)
+        if started is not None and self.slow_active:
+            self._record_slow(time.perf_counter() - started, response.status_code)
+        return response
+
+    def _record_slow(self, total, status_code):
+        if total < self._slow_threshold:
+            return
+        entry = {
+            'path': request.path,
+            'method': request.method,
+            'status': status_code,
+            'total_ms': round(total * 1000, 2),
+            'stages_ms': g.get('profile_stages', {}),
+            'tags': g.get('profile_tags', {}),
+            'at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with self._lock:
+            self._slow_counter += 1
+            item = (total, self._slow_counter, entry)
+            # Min-heap of the slowest N: the fastest kept request is evicted first
+            if len(self._slow_heap) < self._slow_keep:
+                heapq.heappush(self._slow_heap, item)
+            elif total > self._slow_heap[0][0]:
+                heapq.heapreplace(self._slow_heap, item)
+
+    def status(self) -> dict:
+        return {
+            'memory_tracing': tracemalloc.is_tracing(),
+            'cpu_active': self.cpu_active,
+            'cpu_requests_profiled': self._cpu_requests,
+            'slow_active': self.slow_active,
+            'slow_captured': len(self._slow_heap),
+        }
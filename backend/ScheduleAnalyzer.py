@@ -0,0 +1,90 @@
+import heapq
+import logging
+import pytz
+from event import LOCAL_TIMEZONE
+from datetime import datetime, date, time, timedelta
+
+class ScheduleAnalyzer:
+    """Sweep-line interval engine for conflicts and free/busy across schedules.
+
+    Everything is a sort followed by a single linear pass, so comparing hundreds of
+    full-semester schedules is O(n log n) rather than pairwise.
+    """
+
+    def __init__(self, local_timezone=LOCAL_TIMEZONE):
+        # Naive times are local wall-clock times in this zone, the same one Event.to_ics_event assumes
+        self.local_tz = pytz.timezone(local_timezone)
+        logging.info(f"ScheduleAnalyzer initialized ({local_timezone}).")
+
+    def _naive(self, value: datetime) -> datetime:
+        # Parsed events are naive local times while edited ones arrive as UTC; bring those into
+        # the local zone first so both compare on the same wall clock
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(self.local_tz).replace(tzinfo=None)
+
+    def _intervals(self, events):
+        intervals = []
+        for event in events:
+            start, end = self._naive(event.start_time), self._naive(event.end_time)
+            if end > start:
+                intervals.append((start, end, event))
+        intervals.sort(key=lambda interval: (interval[0], interval[1]))
+        return intervals
+
+    def find_conflicts(self, events) -> list:
+        """Returns (event_a, event_b) pairs whose times overlap."""
+        conflicts = []
+        active = []  # min-heap of (end, order, event) for intervals still open
+
+        for order, (start, end, event) in enumerate(self._intervals(events)):
+            # Anything that ended by the time this one starts can no longer overlap
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, _, other in active:
+                conflicts.append((other, event))
+            heapq.heappush(active, (end, order, event))
+
+        return conflicts
+
+    def merge_busy(self, event_lists) -> list:
+        """Unions the events of several schedules into sorted, non-overlapping (start, end) blocks."""
+        all_events = [event for events in event_lists for event in events]
+        busy = []
+        for start, end, _ in self._intervals(all_events):
+            if busy and start <= busy[-1][1]:
+                if end > busy[-1][1]:
+                    busy[-1] = (busy[-1][0], end)
+            else:
+                busy.append((start, end))
+        return busy
+
+    def free_slots(self, busy, window_start: date, window_end: date, day_start: time = time(8, 0),
+                   day_end: time = time(22, 0), min_duration: timedelta = timedelta(minutes=30)) -> list:
+        """Returns the gaps between busy blocks within day_start..day_end on every day of the window."""
+        free = []
+        index = 0
+        current_day = window_start
+
+        while current_day <= window_end:
+            cursor = datetime.combine(current_day, day_start)
+            day_close = datetime.combine(current_day, day_end)
+
+            # busy is sorted, so blocks that ended before today are never looked at again
+            while index < len(busy) and busy[index][1] <= cursor:
+                index += 1
+
+            scan = index
+            while scan < len(busy) and busy[scan][0] < day_close:
+                block_start, block_end = busy[scan]
+                if block_start - cursor >= min_duration:
+                    free.append((cursor, block_start))
+                cursor = max(cursor, block_end)
+                scan += 1
+
+            if day_close - cursor >= min_duration:
+                free.append((cursor, day_close))
+
+            current_day += timedelta(days=1)
+
+        return free
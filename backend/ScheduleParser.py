@@ -1,9 +1,10 @@
-from datetime import datetime, timedelta
-from dateutil import parser as date_parser
+from datetime import datetime
 import re
 import logging
+import proto
 from google.cloud import vision
-from event import Event
+from event import WeeklyEvent, date_weekly_events
+from TimeParser import TimeParser
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -22,6 +23,43 @@ class ScheduleParser:
         }
         self.event_types_list = ['Lecture', 'Laboratory', 'Recitation', 'Seminar', 'Studio', 'Discussion', 'Lab', 'Course', 'Class', 'Tutorial']
         self.event_types_pattern = "(?:" + "|".join(self.event_types_list) + ")"
+        self.time_parser = TimeParser()
+
+        self.day_header_pattern = re.compile(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Wed|Thu|Fri|Sat|Sun)$', re.IGNORECASE)
+        self.time_slot_marker_pattern = re.compile(r'^\d{1,2}:\d{2}(?:AM|PM)$', re.IGNORECASE)
+        self.date_component_pattern = re.compile(r'^(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}$', re.IGNORECASE)
+        self.general_header_footer_pattern = re.compile(r'^(Schedule|Time|PM)$', re.IGNORECASE)
+        self.time_marker_pattern = re.compile(r'^(\d{1,2}:\d{2})\s*(AM|PM)?$', re.IGNORECASE)
+
+        self.event_regex = re.compile(
+            # Group 1: Course Code & Name (e.g., "CS 4071-001 Lecture")
+            # Making department code (like "CS") optional with (?:[A-Z]{2,5}\s*)?
+            r'(?:([A-Z]{2,5}\s*))?(\d{3,4}[A-Z]?\s*(?:-\s*\d{3})?.*?)\s+'
+            
+            # Group 2: Start Time (Optional)
+            # Now more flexible to handle various formats
+            r'(?:(\d{1,2}:\d{2}\s*(?:AM|PM)?)\s*-\s*)?'
+            
+            # Group 3: End Time (Required, but more flexible)
+            r'(\d{1,2}:\d{2}\s*(?:AM|PM)?)'
+            
+            # Group 4: Location (Optional)
+            r'(?:\s+([A-Z\s\d]+))?',
+            re.IGNORECASE | re.DOTALL
+        )
+
+        # Backup regex for cases where only an end time is present
+        self.fallback_regex = re.compile(
+            # Group 1: Course Code & Name
+            r'([A-Z]{0,5}\s*\d{3,4}[A-Z]?\s*(?:-\s*\d{3})?.*?)\s*-\s*'
+            
+            # Group 2: End Time
+            r'(\d{1,2}:\d{2})\s*'
+            
+            # Group 3: Location (Optional)
+            r'([A-Z\s\d]+)?',
+            re.IGNORECASE | re.DOTALL
+        )
 
 
     def _get_bbox_coords(self, bbox_vertices):
@@ -84,28 +122,92 @@ class ScheduleParser:
         return blocks
 
     def parse_text(self, full_text_annotation: vision.TextAnnotation, schedule_start_date: datetime.date, schedule_end_date: datetime.date) -> list:
-        events = []
-        
-        if not full_text_annotation or not full_text_annotation.pages:
+        events, _ = self.parse_text_with_layout(full_text_annotation, schedule_start_date, schedule_end_date)
+        return events
+
+    def parse_text_with_layout(self, full_text_annotation: vision.TextAnnotation, schedule_start_date: datetime.date, schedule_end_date: datetime.date):
+        """Parses an OCR result and also returns the layout (day columns, time markers) it found.
+
+        The layout can be passed back to parse_words() to parse a re-OCR'd region of the
+        same schedule, which usually doesn't contain the headers or time axis itself.
+        """
+        template, layout = self.parse_template(full_text_annotation)
+        return date_weekly_events(template, schedule_start_date, schedule_end_date), layout
+
+    def parse_template(self, full_text_annotation: vision.TextAnnotation):
+        """Parses an OCR result into a date-independent weekly template and its layout.
+
+        The template only depends on the image, so it can be cached and re-dated with
+        date_weekly_events() for any term without OCR'ing or parsing again.
+        """
+        pages = full_text_annotation.get('pages') if isinstance(full_text_annotation, dict) else getattr(full_text_annotation, 'pages', None)
+        if not full_text_annotation or not pages:
             logging.warning("No text annotation or pages found in OCR response.")
-            return []
+            return [], None
 
-        word_elements = [
-            {
-                'text': ''.join([symbol.text for symbol in word.symbols]),
-                'bbox': self._get_bbox_coords(word.bounding_box.vertices)
-            }
-            for page in full_text_annotation.pages
-            for block in page.blocks
-            for paragraph in block.paragraphs
-            for word in paragraph.words
-        ]
+        word_elements = self.extract_words(full_text_annotation)
         
         if not word_elements:
             logging.warning("No words extracted from OCR. Cannot parse events.")
-            return []
-
+            return [], None
 
+        layout = self.build_layout(word_elements)
+        if not layout['day_columns']:
+            logging.warning("No valid day columns could be defined. Cannot parse spatially.")
+            return [], None
+
+        return self.parse_words_template(word_elements, layout), layout
+
+    def extract_words(self, full_text_annotation) -> list:
+        """Flattens an OCR result into a list of {'text', 'bbox'} words in one pass.
+
+        Accepts a proto-plus TextAnnotation, the raw protobuf message underneath it, or
+        Vision's JSON form as a dict. Proto-plus results are unwrapped first, since every
+        field access on the wrapper allocates a new wrapper object.
+        """
+        if isinstance(full_text_annotation, dict):
+            return self._extract_words_json(full_text_annotation)
+        if isinstance(full_text_annotation, proto.Message):
+            full_text_annotation = type(full_text_annotation).pb(full_text_annotation)
+
+        words = []
+        append = words.append
+        for page in full_text_annotation.pages:
+            for block in page.blocks:
+                for paragraph in block.paragraphs:
+                    for word in paragraph.words:
+                        vertices = word.bounding_box.vertices
+                        xs = [v.x for v in vertices]
+                        ys = [v.y for v in vertices]
+                        append({
+                            'text': ''.join([symbol.text for symbol in word.symbols]),
+                            'bbox': (min(xs), max(xs), min(ys), max(ys)) if xs else (0, 0, 0, 0)
+                        })
+        return words
+
+    def _extract_words_json(self, annotation: dict) -> list:
+        # JSON omits zero-valued fields, so a vertex at x=0 has no 'x' key
+        words = []
+        append = words.append
+        for page in annotation.get('pages', ()):
+            for block in page.get('blocks', ()):
+                for paragraph in block.get('paragraphs', ()):
+                    for word in paragraph.get('words', ()):
+                        box = word.get('boundingBox') or word.get('bounding_box') or {}
+                        vertices = box.get('vertices', ())
+                        xs = [v.get('x', 0) for v in vertices]
+                        ys = [v.get('y', 0) for v in vertices]
+                        text = word.get('text')
+                        if text is None:
+                            text = ''.join([symbol.get('text', '') for symbol in word.get('symbols', ())])
+                        append({
+                            'text': text,
+                            'bbox': (min(xs), max(xs), min(ys), max(ys)) if xs else (0, 0, 0, 0)
+                        })
+        return words
+
+    def build_layout(self, word_elements: list) -> dict:
+        """Finds the day columns and time-axis markers of a full schedule."""
         word_elements.sort(key=lambda x: (x['bbox'][2], x['bbox'][0]))
 
         
@@ -113,7 +215,6 @@ class ScheduleParser:
         max_y_overall = max(w['bbox'][3] for w in word_elements) if word_elements else 1 
         
         day_headers_raw = [] 
-        day_header_pattern = re.compile(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Wed|Thu|Fri|Sat|Sun)$', re.IGNORECASE)
         
         header_y_max = max_y_overall * 0.15
 
@@ -121,7 +222,7 @@ class ScheduleParser:
             word_text = word_elem['text']
             min_x, max_x, min_y, max_y = word_elem['bbox']
 
-            if min_y < header_y_max and day_header_pattern.match(word_text):
+            if min_y < header_y_max and self.day_header_pattern.match(word_text):
                 day_name = word_text.capitalize()
                 day_headers_raw.append({'day_name': day_name, 'bbox': word_elem['bbox']})
                 logging.debug(f"Identified potential day header: {day_name} at {word_elem['bbox']}")
@@ -149,26 +250,56 @@ class ScheduleParser:
                 day_columns.append({'day_name': header['day_name'], 'x_start': x_start, 'x_end': x_end})
                 logging.debug(f"Defined column for {header['day_name']}: X-range [{x_start}, {x_end}]")
 
-        if not day_columns:
-            logging.warning("No valid day columns could be defined. Cannot parse spatially.")
-            return []
-
+        # Extract time markers from the schedule for reference
+        time_markers = []
         
-        text_by_day_column = {day['day_name']: [] for day in day_columns}
+        for word_elem in word_elements:
+            word_text = word_elem['text']
+            match = self.time_marker_pattern.match(word_text)
+            if match:
+                time_str = match.group(1)
+                ampm = match.group(2)
+                if ampm:
+                    time_str += ampm
+                time_markers.append({
+                    'time': time_str,
+                    'y_center': (word_elem['bbox'][2] + word_elem['bbox'][3]) / 2
+                })
         
-        time_slot_marker_pattern = re.compile(r'^\d{1,2}:\d{2}(?:AM|PM)$', re.IGNORECASE)
-        date_component_pattern = re.compile(r'^(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}$', re.IGNORECASE)
-        general_header_footer_pattern = re.compile(r'^(Schedule|Time|PM)$', re.IGNORECASE)
+        # Sort time markers by vertical position
+        time_markers.sort(key=lambda m: m['y_center'])
+        logging.debug(f"Identified time markers: {[m['time'] for m in time_markers]}")
+
+        return {
+            'day_columns': day_columns,
+            'time_markers': time_markers,
+            'max_x_overall': max_x_overall,
+            'max_y_overall': max_y_overall
+        }
 
+    def parse_words(self, word_elements: list, layout: dict, schedule_start_date: datetime.date, schedule_end_date: datetime.date) -> list:
+        """Turns words into first-week events using a layout from build_layout()."""
+        return date_weekly_events(self.parse_words_template(word_elements, layout), schedule_start_date, schedule_end_date)
+
+    def parse_words_template(self, word_elements: list, layout: dict) -> list:
+        """Turns words into WeeklyEvents (weekday and time of day only) using a layout from build_layout()."""
+        template = []
+        day_columns = layout['day_columns']
+        time_markers = layout['time_markers']
+        max_y_overall = layout['max_y_overall']
+        event_regex = self.event_regex
+        fallback_regex = self.fallback_regex
+
+        text_by_day_column = {day['day_name']: [] for day in day_columns}
 
         for word_elem in word_elements:
             word_text = word_elem['text']
             min_x, max_x, min_y, max_y = word_elem['bbox']
 
-            if day_header_pattern.match(word_text) or \
-               time_slot_marker_pattern.match(word_text) or \
-               date_component_pattern.match(word_text) or \
-               general_header_footer_pattern.match(word_text):
+            if self.day_header_pattern.match(word_text) or \
+               self.time_slot_marker_pattern.match(word_text) or \
+               self.date_component_pattern.match(word_text) or \
+               self.general_header_footer_pattern.match(word_text):
                 continue
 
             assigned_to_day = False
@@ -188,58 +319,6 @@ class ScheduleParser:
             if not assigned_to_day:
                 logging.debug(f"Word '{word_text}' (bbox {word_elem['bbox']}) not assigned to any day column.")
 
-        
-        event_regex = re.compile(
-            # Group 1: Course Code & Name (e.g., "CS 4071-001 Lecture")
-            # Making department code (like "CS") optional with (?:[A-Z]{2,5}\s*)?
-            r'(?:([A-Z]{2,5}\s*))?(\d{3,4}[A-Z]?\s*(?:-\s*\d{3})?.*?)\s+'
-            
-            # Group 2: Start Time (Optional)
-            # Now more flexible to handle various formats
-            r'(?:(\d{1,2}:\d{2}\s*(?:AM|PM)?)\s*-\s*)?'
-            
-            # Group 3: End Time (Required, but more flexible)
-            r'(\d{1,2}:\d{2}\s*(?:AM|PM)?)'
-            
-            # Group 4: Location (Optional)
-            r'(?:\s+([A-Z\s\d]+))?',
-            re.IGNORECASE | re.DOTALL
-        )
-
-        # Backup regex for cases where only an end time is present
-        fallback_regex = re.compile(
-            # Group 1: Course Code & Name
-            r'([A-Z]{0,5}\s*\d{3,4}[A-Z]?\s*(?:-\s*\d{3})?.*?)\s*-\s*'
-            
-            # Group 2: End Time
-            r'(\d{1,2}:\d{2})\s*'
-            
-            # Group 3: Location (Optional)
-            r'([A-Z\s\d]+)?',
-            re.IGNORECASE | re.DOTALL
-        )
-
-        # Extract time markers from the schedule for reference
-        time_markers = []
-        time_marker_pattern = re.compile(r'^(\d{1,2}:\d{2})\s*(AM|PM)?$', re.IGNORECASE)
-        
-        for word_elem in word_elements:
-            word_text = word_elem['text']
-            match = time_marker_pattern.match(word_text)
-            if match:
-                time_str = match.group(1)
-                ampm = match.group(2)
-                if ampm:
-                    time_str += ampm
-                time_markers.append({
-                    'time': time_str,
-                    'y_center': (word_elem['bbox'][2] + word_elem['bbox'][3]) / 2
-                })
-        
-        # Sort time markers by vertical position
-        time_markers.sort(key=lambda m: m['y_center'])
-        logging.debug(f"Identified time markers: {[m['time'] for m in time_markers]}")
-
         for day_name, day_words in text_by_day_column.items():
             if not day_words:
                 logging.info(f"No content words found for {day_name} column.")
@@ -369,43 +448,28 @@ class ScheduleParser:
                     logging.error(f"Invalid day name '{day_name}' encountered. Skipping event.")
                     continue
 
-                # Find first occurrence of this day of week within the schedule
-                first_occurrence_date = schedule_start_date
-                while first_occurrence_date.weekday() != day_index:
-                    first_occurrence_date += timedelta(days=1)
-                
-                # Generate only ONE WEEK of events (for editing purposes)
-                # The frontend will multiply this week by the number of weeks specified
-                current_date = first_occurrence_date
-                
-                # Only create events for the first week
-                if current_date <= schedule_end_date:
-                    try:
-                        # Create datetime objects for this specific occurrence
-                        event_start_datetime = date_parser.parse(f"{current_date.isoformat()} {start_time_str}")
-                        event_end_datetime = date_parser.parse(f"{current_date.isoformat()} {end_time_str}")
-                        
-                        # Handle case where end time is on the next day (e.g., evening classes)
-                        if event_end_datetime < event_start_datetime:
-                            event_end_datetime += timedelta(days=1)
-                        
-                        # Create event without recurrence rule (since we're creating individual instances)
-                        new_event = Event(
-                            name=event_name,
-                            start_time=event_start_datetime,
-                            end_time=event_end_datetime,
-                            location=location,
-                            recurrence_rule=None  # No recurrence rule needed for individual events
-                        )
-                        events.append(new_event)
-                        logging.debug(f"Created event instance for first week: {new_event.name} on {current_date.isoformat()}")
-                        
-                    except Exception as e:
-                        logging.error(f"Could not create event for '{event_name}' on {current_date.isoformat()}: {e}")
-                
-                logging.info(f"Successfully created first week instance for: {event_name} on {day_name}")
+                try:
+                    start_time = self.time_parser.parse_time(start_time_str)
+                    end_time = self.time_parser.parse_time(end_time_str)
+                except Exception as e:
+                    logging.error(f"Could not read times for '{event_name}' on {day_name}: {e}")
+                    continue
+
+                # End times before the start (e.g., evening classes) roll over to the next day
+                template.append(WeeklyEvent(
+                    weekday=day_index,
+                    start=start_time,
+                    end=end_time,
+                    name=event_name,
+                    location=location,
+                    source_bbox=(
+                        min(w['bbox'][0] for w in block), max(w['bbox'][1] for w in block),
+                        min(w['bbox'][2] for w in block), max(w['bbox'][3] for w in block)
+                    )
+                ))
+                logging.info(f"Added weekly template entry for: {event_name} on {day_name}")
         
-        return events
+        return template
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,41 @@
+import threading
+import logging
+from collections import OrderedDict
+
+class ScheduleTemplateCache:
+    """Least-recently-used cache of parsed weekly templates keyed by image hash.
+
+    A template (and the layout it was parsed with) only depends on the image, so
+    uploading the same screenshot again with a different start date or week count
+    can be re-dated straight away without another Vision call or parse.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        logging.info(f"ScheduleTemplateCache initialized (max_entries={max_entries}).")
+
+    def get(self, image_hash):
+        """Returns (template, layout) for the image, or None if it hasn't been parsed."""
+        with self._lock:
+            entry = self._entries.get(image_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(image_hash)
+            self.hits += 1
+            return entry
+
+    def put(self, image_hash, template, layout):
+        with self._lock:
+            self._entries[image_hash] = (template, layout)
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
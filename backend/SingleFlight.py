@@ -0,0 +1,65 @@
+import threading
+import logging
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a caller that gave up waiting on another caller's in-flight work."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the work; callers arriving while it is in
+    flight wait for its result (or its exception) instead of repeating it. Nothing
+    is kept once the call finishes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'leaders': 0, 'followers': 0, 'timeouts': 0, 'errors': 0}
+        logging.info("SingleFlight initialized.")
+
+    def do(self, key, fn, timeout=None):
+        """Returns (result, shared). shared is True if another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['leaders'] += 1
+            else:
+                self.stats['followers'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result, False
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    self.stats['errors'] += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for in-flight work on {key}")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
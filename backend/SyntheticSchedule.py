@@ -0,0 +1,84 @@
+"""Synthetic Vision annotations shaped like a weekly class-schedule screenshot.
+
+The layout mirrors what ScheduleParser expects: day headers across the top,
+hour markers down the left edge and one three-line block per class, so the
+generated annotations parse into real events. The server warms workers up with
+one of these, and the load-test kit and benchmarks use them as OCR results.
+"""
+import random
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+DEPARTMENTS = ['CS', 'MATH', 'PHYS', 'ENGL', 'CHEM', 'EECE']
+BUILDINGS = ['BALDWIN', 'RHODES', 'SWIFT', 'OLD', 'TEACHERS', 'BRAUNSTEIN']
+CHAR_WIDTH = 10
+LINE_HEIGHT = 14
+LINE_SPACING = 18
+HOUR_HEIGHT = 90
+FIRST_HOUR = 8
+LAST_HOUR = 17
+
+
+def _word(text, x, y):
+    width = CHAR_WIDTH * len(text)
+    return {
+        'boundingBox': {'vertices': [
+            {'x': x, 'y': y}, {'x': x + width, 'y': y},
+            {'x': x + width, 'y': y + LINE_HEIGHT}, {'x': x, 'y': y + LINE_HEIGHT},
+        ]},
+        'symbols': [{'text': char} for char in text],
+    }
+
+
+def _line(text, x, y):
+    words = []
+    for token in text.split():
+        words.append(_word(token, x, y))
+        x += CHAR_WIDTH * (len(token) + 1)
+    return words
+
+
+def _clock(hour, minute):
+    # Block times carry no AM/PM, like most schedule screenshots; the parser infers it
+    return f"{(hour - 1) % 12 + 1}:{minute:02d}"
+
+
+def _hour_y(hour, minute=0):
+    return 100 + (hour - FIRST_HOUR) * HOUR_HEIGHT + int(minute * HOUR_HEIGHT / 60)
+
+
+def synthetic_annotation(seed=0, classes_per_day=(2, 4), days=DAY_NAMES) -> dict:
+    """Returns a TextAnnotation in Vision's JSON form (the fullTextAnnotation field)."""
+    rng = random.Random(seed)
+    column_width = 170
+    words = []
+
+    for index, day in enumerate(days):
+        words += _line(day, 150 + index * column_width, 20)
+
+    for hour in range(FIRST_HOUR, LAST_HOUR + 2):
+        suffix = 'AM' if hour < 12 else 'PM'
+        words += _line(f"{(hour - 1) % 12 + 1}:00{suffix}", 10, _hour_y(hour))
+
+    for index, day in enumerate(days):
+        x = 120 + index * column_width
+        # Classes start at least two hours apart so their blocks never touch
+        hours = sorted(rng.sample(range(FIRST_HOUR, LAST_HOUR + 1, 2), rng.randint(*classes_per_day)))
+        for hour in hours:
+            minute = rng.choice([0, 5, 10, 20, 25, 30])
+            length = rng.choice([55, 80, 110])
+            end_total = hour * 60 + minute + length
+            name = f"{rng.choice(DEPARTMENTS)} {rng.randint(1000, 5999)}-00{rng.randint(1, 4)} Lecture"
+            room = f"{rng.choice(BUILDINGS)} {rng.randint(100, 899)}"
+            y = _hour_y(hour, minute)
+            words += _line(name, x, y)
+            words += _line(f"{_clock(hour, minute)} - {_clock(end_total // 60, end_total % 60)}", x, y + LINE_SPACING)
+            words += _line(room, x, y + 2 * LINE_SPACING)
+
+    return {
+        'pages': [{
+            'width': 120 + len(days) * column_width,
+            'height': _hour_y(LAST_HOUR + 2),
+            'blocks': [{'paragraphs': [{'words': words}]}],
+        }],
+        'text': ' '.join(''.join(s['text'] for s in w['symbols']) for w in words),
+    }
@@ -0,0 +1,74 @@
+from datetime import datetime, date, time
+from dateutil import parser as date_parser
+import re
+import logging
+
+class TimeParser:
+    """Fast parser for the fixed-format time tokens produced by ScheduleParser.
+
+    Schedules only ever contain a handful of distinct tokens like '10:10AM' or
+    '1:25PM', so parsed results are memoized and combined with dates directly.
+    dateutil is only used as a fallback for tokens the fast path rejects.
+    """
+
+    time_token_pattern = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*(?:([AaPp])\.?[Mm]\.?)?\s*$')
+
+    def __init__(self, max_cache_size=512):
+        self.max_cache_size = max_cache_size
+        self._time_cache = {}
+
+    def parse_time(self, token: str) -> time:
+        """Turns a token like '1:25PM' or '13:25' into a time object."""
+        cached = self._time_cache.get(token)
+        if cached is not None:
+            return cached
+
+        parsed = self._parse_time_fast(token)
+        if parsed is None:
+            logging.debug(f"Falling back to dateutil for time token '{token}'")
+            parsed = date_parser.parse(token).time()
+
+        # The set of distinct tokens is tiny, so a full reset is cheaper than LRU bookkeeping
+        if len(self._time_cache) >= self.max_cache_size:
+            self._time_cache.clear()
+        self._time_cache[token] = parsed
+        return parsed
+
+    def _parse_time_fast(self, token: str):
+        match = self.time_token_pattern.match(token)
+        if not match:
+            return None
+
+        hour = int(match.group(1))
+        minute = int(match.group(2))
+        meridiem = match.group(3)
+        if minute > 59:
+            return None
+
+        if meridiem:
+            # Same rules as dateutil: 12AM is midnight, 12PM is noon
+            if hour < 1 or hour > 12:
+                return None
+            if meridiem in 'Pp' and hour != 12:
+                hour += 12
+            elif meridiem in 'Aa' and hour == 12:
+                hour = 0
+        elif hour > 23:
+            return None
+
+        return time(hour, minute)
+
+    def combine(self, day: date, token: str) -> datetime:
+        """Builds a naive datetime for the given date and time token."""
+        return datetime.combine(day, self.parse_time(token))
+
+    def parse_date(self, value: str) -> date:
+        """Parses an ISO date (or datetime) string, falling back to dateutil for anything else."""
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            return datetime.fromisoformat(value).date()
+        except (TypeError, ValueError):
+            return date_parser.parse(value).date()
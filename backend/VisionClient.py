@@ -0,0 +1,251 @@
+import os
+import random
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from google.api_core import exceptions as api_exceptions
+from google.cloud import vision
+
+# Errors worth retrying: the request may succeed if sent again
+TRANSIENT_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.BadGateway,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class VisionQuotaExceeded(Exception):
+    """Raised when the concurrency limiter has no free slot for a Vision call."""
+
+
+def create_vision_client(endpoint: str = None, transport: str = None) -> vision.ImageAnnotatorClient:
+    """Builds an ImageAnnotatorClient, optionally pointed at a local stand-in.
+
+    VISION_API_ENDPOINT (e.g. 'localhost:9000') switches to an unauthenticated
+    channel; VISION_API_TRANSPORT selects 'grpc' (default) or 'rest'.
+    """
+    endpoint = endpoint or os.environ.get('VISION_API_ENDPOINT')
+    if not endpoint:
+        return vision.ImageAnnotatorClient()
+
+    from google.auth.credentials import AnonymousCredentials
+    transport = transport or os.environ.get('VISION_API_TRANSPORT', 'grpc')
+    logging.info(f"Using Vision API stand-in at {endpoint} over {transport}")
+    if transport == 'rest':
+        if not endpoint.startswith(('http://', 'https://')):
+            endpoint = f"http://{endpoint}"
+        return vision.ImageAnnotatorClient(
+            transport='rest',
+            credentials=AnonymousCredentials(),
+            client_options={'api_endpoint': endpoint}
+        )
+
+    import grpc
+    from google.cloud.vision_v1.services.image_annotator.transports import ImageAnnotatorGrpcTransport
+    channel = grpc.insecure_channel(endpoint)
+    return vision.ImageAnnotatorClient(transport=ImageAnnotatorGrpcTransport(channel=channel))
+
+
+class ResilientVisionClient:
+    """Wraps an ImageAnnotatorClient with deadlines, retries, hedging and a concurrency limit.
+
+    Exposes the same document_text_detection() call as the wrapped client so it
+    can be handed straight to OCRService. The wrapped client can be anything with
+    that method, which keeps the wrapper testable against a local fake.
+    """
+
+    def __init__(self, client, timeout=10.0, max_attempts=3, backoff_base=0.25, backoff_max=4.0,
+                 hedge_percentile=None, hedge_min_samples=20, max_concurrency=8, acquire_timeout=5.0,
+                 latency_window=500):
+        self.client = client
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # e.g. 95 sends a duplicate request once the first has been out longer than the recent p95
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.acquire_timeout = acquire_timeout
+
+        self._limiter = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix='vision')
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._counters = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'attempts': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'transient_errors': 0,
+            'hedges_sent': 0,
+            'hedges_won': 0,
+            'limiter_rejections': 0,
+            'in_flight': 0,
+        }
+        logging.info(f"ResilientVisionClient initialized (timeout={timeout}s, attempts={max_attempts}, "
+                     f"hedge_percentile={hedge_percentile}, max_concurrency={max_concurrency}).")
+
+    @classmethod
+    def from_env(cls, client):
+        """Reads the wrapper settings from VISION_* environment variables."""
+        hedge = os.environ.get('VISION_HEDGE_PERCENTILE')
+        return cls(
+            client,
+            timeout=float(os.environ.get('VISION_TIMEOUT', 10.0)),
+            max_attempts=int(os.environ.get('VISION_MAX_ATTEMPTS', 3)),
+            hedge_percentile=float(hedge) if hedge else None,
+            max_concurrency=int(os.environ.get('VISION_MAX_CONCURRENCY', 8)),
+            acquire_timeout=float(os.environ.get('VISION_ACQUIRE_TIMEOUT', 5.0)),
+        )
+
+    def warm_up(self, timeout=5.0) -> bool:
+        """Connects the wrapped client's gRPC channel ahead of the first request.
+
+        Returns False if the channel didn't come up within timeout. REST clients
+        connect on first use, so there is nothing to do for them.
+        """
+        channel = getattr(getattr(self.client, 'transport', None), 'grpc_channel', None)
+        if channel is None:
+            return True
+        import grpc
+        try:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            return False
+
+    def document_text_detection(self, image, timeout=None, **kwargs):
+        timeout = timeout or self.timeout
+        self._count('calls')
+        last_error = None
+
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                self._count('retries')
+                time.sleep(self._backoff(attempt))
+            try:
+                response = self._call_with_hedging(image, timeout, kwargs)
+                self._count('successes')
+                return response
+            except VisionQuotaExceeded:
+                self._count('failures')
+                raise
+            except TRANSIENT_ERRORS as e:
+                self._count('transient_errors')
+                if isinstance(e, (api_exceptions.DeadlineExceeded, TimeoutError)):
+                    self._count('timeouts')
+                logging.warning(f"Transient Vision error on attempt {attempt + 1}/{self.max_attempts}: {e}")
+                last_error = e
+            except Exception:
+                self._count('failures')
+                raise
+
+        self._count('failures')
+        raise last_error
+
+    def _backoff(self, attempt):
+        # Full jitter: spreads retries out so a burst of failures doesn't retry in lockstep
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _call_with_hedging(self, image, timeout, kwargs):
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None or hedge_delay >= timeout:
+            return self._attempt(image, timeout, kwargs, block=True)
+
+        primary = self._executor.submit(self._attempt, image, timeout, kwargs, True)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        try:
+            hedge = self._executor.submit(self._attempt, image, timeout - hedge_delay, kwargs, False, True)
+        except RuntimeError:
+            return primary.result()
+        pending = {primary, hedge}
+
+        # Return the first success; only fail once both copies have failed
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except VisionQuotaExceeded as e:
+                    # The hedge couldn't get a slot, keep waiting on the primary
+                    error = error or e
+                    continue
+                except Exception as e:
+                    error = e
+                    continue
+                if future is hedge:
+                    self._count('hedges_won')
+                return result
+        raise error
+
+    def _attempt(self, image, timeout, kwargs, block, hedge=False):
+        # Hedges never wait for a slot: they're only worth sending if there is spare quota
+        if not self._limiter.acquire(blocking=block, timeout=self.acquire_timeout if block else None):
+            self._count('limiter_rejections')
+            raise VisionQuotaExceeded("No free Vision API slot available.")
+
+        # Counted only once the hedge holds a slot, so hedges_sent is what actually went out
+        if hedge:
+            self._count('hedges_sent')
+        self._count('attempts')
+        self._count('in_flight')
+        started = time.monotonic()
+        try:
+            response = self.client.document_text_detection(image=image, timeout=timeout, retry=None, **kwargs)
+            # Per-image failures come back inside the response instead of as an exception
+            if response.error.code:
+                raise api_exceptions.from_grpc_status(response.error.code, response.error.message)
+            with self._lock:
+                self._latencies.append(time.monotonic() - started)
+            return response
+        finally:
+            self._count('in_flight', -1)
+            self._limiter.release()
+
+    def _hedge_delay(self):
+        if not self.hedge_percentile:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            samples = sorted(self._latencies)
+        return self._percentile(samples, self.hedge_percentile)
+
+    def _percentile(self, sorted_samples, percentile):
+        if not sorted_samples:
+            return None
+        index = min(len(sorted_samples) - 1, int(round(percentile / 100 * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def metrics(self) -> dict:
+        """Returns counters and recent latency percentiles (seconds)."""
+        with self._lock:
+            counters = dict(self._counters)
+            samples = sorted(self._latencies)
+        counters['latency'] = {
+            'samples': len(samples),
+            'p50': self._percentile(samples, 50),
+            'p95': self._percentile(samples, 95),
+            'p99': self._percentile(samples, 99),
+        }
+        counters['hedge_delay'] = self._hedge_delay()
+        return counters
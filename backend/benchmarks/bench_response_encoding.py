@@ -0,0 +1,101 @@
+"""Benchmark: bytes on the wire and encode time per endpoint payload.
+
+Compares the previous path (per-event isoformat() + stdlib json, no compression)
+against ApiResponse.dumps with gzip and brotli, using synthetic schedules.
+
+Run from the backend folder:
+    python benchmarks/bench_response_encoding.py
+"""
+import gzip
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import ApiResponse
+from ICSExporter import ICSExporter
+from ScheduleAnalyzer import ScheduleAnalyzer
+from event import Event, multiply_weekly_events
+
+CLASSES_PER_WEEK = 15
+SEMESTER_WEEKS = 16
+
+
+def synthetic_week(start=datetime(2025, 8, 25)):
+    events = []
+    for i in range(CLASSES_PER_WEEK):
+        day = start + timedelta(days=i % 5, hours=8 + (i % 6) * 1.5)
+        events.append(Event(f"CS {4000 + i}-00{i % 3 + 1} Lecture", day, day + timedelta(minutes=55), f"BALDWIN {600 + i}"))
+    return events
+
+
+def convert_payload_stdlib(events):
+    events_json = [{'id': id(e), 'name': e.name, 'startTime': e.start_time.isoformat(),
+                    'endTime': e.end_time.isoformat(), 'location': e.location or '', 'allDay': False} for e in events]
+    return json.dumps({"success": True, "events": events_json, "session_id": "0" * 32,
+                       "number_of_weeks": SEMESTER_WEEKS, "start_date": "2025-08-25"}).encode('utf-8')
+
+
+def convert_payload_fast(events):
+    events_json = [{'id': id(e), 'name': e.name, 'startTime': e.start_time, 'endTime': e.end_time,
+                    'location': e.location or '', 'allDay': False} for e in events]
+    return ApiResponse.dumps({"success": True, "events": events_json, "session_id": "0" * 32,
+                              "number_of_weeks": SEMESTER_WEEKS, "start_date": "2025-08-25"})
+
+
+def freebusy_payloads(schedules):
+    analyzer = ScheduleAnalyzer()
+    busy = analyzer.merge_busy(schedules)
+    free = analyzer.free_slots(busy, busy[0][0].date(), busy[-1][1].date())
+
+    def stdlib():
+        return json.dumps({"success": True,
+                           "busy": [{'startTime': s.isoformat(), 'endTime': e.isoformat()} for s, e in busy],
+                           "free": [{'startTime': s.isoformat(), 'endTime': e.isoformat()} for s, e in free]}).encode('utf-8')
+
+    def fast():
+        return ApiResponse.dumps({"success": True,
+                                  "busy": [{'startTime': s, 'endTime': e} for s, e in busy],
+                                  "free": [{'startTime': s, 'endTime': e} for s, e in free]})
+    return stdlib, fast
+
+
+def report(name, encode, repeat=5, number=200):
+    body = encode()
+    seconds = min(timeit.repeat(encode, repeat=repeat, number=number)) / number
+    sizes = {'raw': len(body), 'gzip': len(gzip.compress(body, compresslevel=6))}
+    if ApiResponse.brotli is not None:
+        sizes['br'] = len(ApiResponse.brotli.compress(body, quality=5))
+    size_text = '  '.join(f"{k}={v:>7}B" for k, v in sizes.items())
+    print(f"{name:<42} {seconds * 1e6:9.1f} us  {size_text}")
+
+
+def main():
+    week = synthetic_week()
+    semester = multiply_weekly_events(week, None, SEMESTER_WEEKS)
+    print(f"orjson available: {ApiResponse.orjson is not None}, brotli available: {ApiResponse.brotli is not None}\n")
+
+    print("/api/convert-schedule (one base week)")
+    report("  stdlib json + isoformat()", lambda: convert_payload_stdlib(week))
+    report("  ApiResponse.dumps", lambda: convert_payload_fast(week))
+
+    print(f"/api/convert-schedule ({SEMESTER_WEEKS} weeks of events)")
+    report("  stdlib json + isoformat()", lambda: convert_payload_stdlib(semester))
+    report("  ApiResponse.dumps", lambda: convert_payload_fast(semester))
+
+    print(f"/api/freebusy (50 schedules x {SEMESTER_WEEKS} weeks)")
+    schedules = [multiply_weekly_events(synthetic_week(datetime(2025, 8, 25) + timedelta(minutes=i * 17)), None, SEMESTER_WEEKS)
+                 for i in range(50)]
+    stdlib, fast = freebusy_payloads(schedules)
+    report("  stdlib json + isoformat()", stdlib, number=20)
+    report("  ApiResponse.dumps", fast, number=20)
+
+    print(f"/api/downloadICS ({SEMESTER_WEEKS} weeks)")
+    exporter = ICSExporter()
+    report("  ICSExporter.generate_ics", lambda: exporter.generate_ics(semester).encode('utf-8'), repeat=3, number=5)
+
+
+if __name__ == '__main__':
+    main()
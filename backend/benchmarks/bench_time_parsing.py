@@ -0,0 +1,51 @@
+"""Micro-benchmark: dateutil per-event parsing vs the memoized TimeParser.
+
+Run from the backend folder:
+    python benchmarks/bench_time_parsing.py
+"""
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+from dateutil import parser as date_parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from TimeParser import TimeParser
+
+# Tokens as they look after ScheduleParser normalization
+TIME_TOKENS = ['8:00AM', '9:05AM', '10:10AM', '11:15AM', '12:20PM', '1:25PM', '2:30PM', '3:35PM', '5:00PM', '6:40PM']
+DATES = [date(2025, 8, 25) + timedelta(days=i) for i in range(5)]
+PAIRS = [(d, t) for d in DATES for t in TIME_TOKENS]
+
+
+def current_path():
+    for current_date, token in PAIRS:
+        date_parser.parse(f"{current_date.isoformat()} {token}")
+
+
+def fast_path(time_parser):
+    for current_date, token in PAIRS:
+        time_parser.combine(current_date, token)
+
+
+def main(repeat=5, number=200):
+    time_parser = TimeParser()
+
+    # Both paths must agree before timing anything
+    for current_date, token in PAIRS:
+        expected = date_parser.parse(f"{current_date.isoformat()} {token}")
+        assert time_parser.combine(current_date, token) == expected, token
+
+    results = {
+        'dateutil': min(timeit.repeat(current_path, repeat=repeat, number=number)),
+        'TimeParser': min(timeit.repeat(lambda: fast_path(time_parser), repeat=repeat, number=number)),
+    }
+
+    calls = len(PAIRS) * number
+    for name, seconds in results.items():
+        print(f"{name:>10}: {seconds / calls * 1e6:8.2f} us/parse ({calls} parses in {seconds:.3f}s)")
+    print(f"speedup: {results['dateutil'] / results['TimeParser']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
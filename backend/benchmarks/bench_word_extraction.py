@@ -0,0 +1,67 @@
+"""Benchmark: word/bbox extraction from OCR results.
+
+Compares the previous proto-plus comprehension with ScheduleParser.extract_words
+on the raw protobuf message and on Vision's JSON form, for a dense synthetic page.
+
+Run from the backend folder:
+    python benchmarks/bench_word_extraction.py
+"""
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+logging.basicConfig(level=logging.WARNING)
+
+from google.cloud import vision
+from SyntheticSchedule import synthetic_annotation
+from ScheduleParser import ScheduleParser
+
+
+def dense_annotation(copies=20):
+    annotation = synthetic_annotation(seed=1, classes_per_day=(5, 5))
+    words = annotation['pages'][0]['blocks'][0]['paragraphs'][0]['words']
+    annotation['pages'][0]['blocks'] = [{'paragraphs': [{'words': words}]} for _ in range(copies)]
+    return annotation
+
+
+def proto_plus_comprehension(parser, annotation):
+    # The extraction parse_text used before it read the raw message
+    return [
+        {
+            'text': ''.join([symbol.text for symbol in word.symbols]),
+            'bbox': parser._get_bbox_coords(word.bounding_box.vertices)
+        }
+        for page in annotation.pages
+        for block in page.blocks
+        for paragraph in block.paragraphs
+        for word in paragraph.words
+    ]
+
+
+def main(repeat=5, number=10):
+    parser = ScheduleParser()
+    as_json = dense_annotation()
+    as_proto_plus = vision.TextAnnotation.from_json(json.dumps(as_json))
+
+    expected = proto_plus_comprehension(parser, as_proto_plus)
+    assert parser.extract_words(as_proto_plus) == expected
+    assert parser.extract_words(as_json) == expected
+    print(f"{len(expected)} words per extraction\n")
+
+    cases = {
+        'proto-plus comprehension': lambda: proto_plus_comprehension(parser, as_proto_plus),
+        'extract_words (raw protobuf)': lambda: parser.extract_words(as_proto_plus),
+        'extract_words (JSON dict)': lambda: parser.extract_words(as_json),
+    }
+    baseline = None
+    for name, run in cases.items():
+        seconds = min(timeit.repeat(run, repeat=repeat, number=number)) / number
+        baseline = baseline or seconds
+        print(f"{name:<30} {seconds * 1000:8.2f} ms  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Offline bulk conversion: schedule images (or recorded OCR annotations) -> ICS files.
+
+Runs OCRService -> ScheduleParser -> ICSExporter in a process pool without going
+through Flask. Every finished file is appended to a manifest in the output folder,
+so re-running the same command skips inputs that already converted.
+
+Usage (from the backend folder):
+    python bulk_convert.py INPUT_DIR OUTPUT_DIR --start-date 2025-08-25 --weeks 15
+
+Inputs ending in .json are treated as recorded Vision responses, either a full
+AnnotateImageResponse or just its fullTextAnnotation, and skip the OCR call.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+# Configure logging before the service modules call basicConfig themselves
+logging.basicConfig(level=logging.WARNING, format="%(levelname)s:%(name)s:%(message)s")
+
+from OCRService import OCRService
+from ScheduleParser import ScheduleParser
+from ICSExporter import ICSExporter
+from TimeParser import TimeParser
+from event import multiply_weekly_events
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tif', '.tiff'}
+ANNOTATION_EXTENSIONS = {'.json'}
+MANIFEST_NAME = 'manifest.jsonl'
+
+# Per-process services, built once by the pool initializer
+_worker = {}
+
+
+def _init_worker(log_level):
+    logging.getLogger().setLevel(log_level)
+    _worker['parser'] = ScheduleParser()
+    _worker['exporter'] = ICSExporter()
+    _worker['ocr'] = None
+
+
+def _get_ocr_service():
+    # Only workers that actually see an image pay for the Vision client
+    if _worker['ocr'] is None:
+        from VisionClient import ResilientVisionClient, create_vision_client
+        _worker['ocr'] = OCRService(ResilientVisionClient.from_env(create_vision_client()))
+    return _worker['ocr']
+
+
+def load_annotation(data: bytes) -> dict:
+    """Reads a recorded Vision response or a bare TextAnnotation from JSON.
+
+    The JSON dict is handed to ScheduleParser as-is, which avoids building proto messages.
+    """
+    annotation = json.loads(data)
+    for key in ('fullTextAnnotation', 'full_text_annotation'):
+        if key in annotation:
+            return annotation[key]
+    return annotation
+
+
+def convert_file(job):
+    input_path, output_path, digest, start_date, number_of_weeks = job
+    started = time.perf_counter()
+    result = {'input': os.path.basename(input_path), 'output': os.path.basename(output_path), 'sha256': digest,
+              'start_date': start_date.isoformat(), 'weeks': number_of_weeks}
+    try:
+        with open(input_path, 'rb') as f:
+            data = f.read()
+
+        if os.path.splitext(input_path)[1].lower() in ANNOTATION_EXTENSIONS:
+            annotation = load_annotation(data)
+        else:
+            annotation = _get_ocr_service().process_image(data)
+
+        end_date = start_date + timedelta(weeks=number_of_weeks)
+        events = _worker['parser'].parse_text(annotation, schedule_start_date=start_date, schedule_end_date=end_date)
+        all_events = multiply_weekly_events(events, start_date, number_of_weeks)
+        ics_content = _worker['exporter'].generate_ics(all_events, stable_uids=True)
+
+        # Write then rename so an interrupted run never leaves a half-written calendar behind
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(ics_content)
+        os.replace(tmp_path, output_path)
+
+        result.update(status='ok', events=len(events))
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(manifest_path):
+    """Returns {input name: (sha256, start date, weeks)} for every input the manifest records as converted."""
+    done = {}
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if entry.get('status') == 'ok':
+                # Entries from before start_date/weeks were recorded never match, so those files re-convert
+                done[entry['input']] = (entry['sha256'], entry.get('start_date'), entry.get('weeks'))
+            else:
+                done.pop(entry.get('input'), None)
+    return done
+
+
+def list_inputs(input_dir):
+    names = []
+    for name in sorted(os.listdir(input_dir)):
+        extension = os.path.splitext(name)[1].lower()
+        if os.path.isfile(os.path.join(input_dir, name)) and extension in IMAGE_EXTENSIONS | ANNOTATION_EXTENSIONS:
+            names.append(name)
+    return names
+
+
+def output_name(name):
+    return os.path.splitext(name)[0] + '.ics'
+
+
+def find_output_collisions(names):
+    """Groups inputs that would write the same .ics file, e.g. week1.png and week1.json."""
+    by_output = {}
+    for name in names:
+        # Compared case-insensitively, since A.png and a.png collide on macOS and Windows
+        by_output.setdefault(output_name(name).lower(), []).append(name)
+    return [group for group in by_output.values() if len(group) > 1]
+
+
+def collect_jobs(input_dir, output_dir, start_date, number_of_weeks, done):
+    jobs, skipped = [], 0
+    for name in list_inputs(input_dir):
+        input_path = os.path.join(input_dir, name)
+        output_path = os.path.join(output_dir, output_name(name))
+        digest = file_sha256(input_path)
+        # A calendar for another term is as stale as one for another image
+        if done.get(name) == (digest, start_date.isoformat(), number_of_weeks) and os.path.exists(output_path):
+            skipped += 1
+            continue
+        jobs.append((input_path, output_path, digest, start_date, number_of_weeks))
+    return jobs, skipped
+
+
+def print_progress(completed, total, failed, started):
+    elapsed = time.perf_counter() - started
+    rate = completed / elapsed if elapsed > 0 else 0.0
+    remaining = (total - completed) / rate if rate > 0 else 0.0
+    sys.stderr.write(f"\r[{completed}/{total}] {rate:6.1f} files/s  failed={failed}  eta={remaining:6.0f}s")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Convert a folder of schedule images into ICS files.")
+    arg_parser.add_argument('input_dir', help="Folder of schedule images and/or recorded annotation .json files")
+    arg_parser.add_argument('output_dir', help="Folder for the .ics files and the resume manifest")
+    arg_parser.add_argument('--start-date', default=datetime.now().date().isoformat(),
+                            help="First day of the schedule (default: today)")
+    arg_parser.add_argument('--weeks', type=int, default=1, help="Number of weeks to generate (default: 1)")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    arg_parser.add_argument('--manifest', help=f"Manifest path (default: OUTPUT_DIR/{MANIFEST_NAME})")
+    arg_parser.add_argument('--no-resume', action='store_true', help="Convert everything, ignoring the manifest")
+    arg_parser.add_argument('--verbose', action='store_true', help="Show service logging from the workers")
+    args = arg_parser.parse_args(argv)
+
+    if args.weeks < 1:
+        arg_parser.error("--weeks must be at least 1")
+    try:
+        start_date = TimeParser().parse_date(args.start_date)
+    except (ValueError, OverflowError) as e:
+        arg_parser.error(f"invalid --start-date: {e}")
+
+    collisions = find_output_collisions(list_inputs(args.input_dir))
+    if collisions:
+        arg_parser.error("inputs that would overwrite each other's .ics file: "
+                         + "; ".join(", ".join(group) for group in collisions))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(args.output_dir, MANIFEST_NAME)
+    done = {} if args.no_resume else read_manifest(manifest_path)
+    jobs, skipped = collect_jobs(args.input_dir, args.output_dir, start_date, args.weeks, done)
+
+    print(f"{len(jobs)} files to convert, {skipped} already done, {args.workers} workers, "
+          f"starting {start_date.isoformat()} for {args.weeks} weeks", file=sys.stderr)
+    if not jobs:
+        return 0
+
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    completed, failed, total_events = 0, 0, 0
+    started = time.perf_counter()
+
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+         Pool(processes=args.workers, initializer=_init_worker, initargs=(log_level,)) as pool:
+        for result in pool.imap_unordered(convert_file, jobs):
+            result['finished_at'] = datetime.now().isoformat(timespec='seconds')
+            manifest.write(json.dumps(result) + '\n')
+            manifest.flush()
+
+            completed += 1
+            if result['status'] == 'ok':
+                total_events += result['events']
+            else:
+                failed += 1
+                sys.stderr.write(f"\nFailed: {result['input']}: {result['error']}\n")
+            print_progress(completed, len(jobs), failed, started)
+
+    elapsed = time.perf_counter() - started
+    sys.stderr.write('\n')
+    print(f"Converted {completed - failed}/{len(jobs)} files ({failed} failed, {skipped} skipped) in {elapsed:.1f}s")
+    print(f"Throughput: {completed / elapsed:.2f} files/s, {total_events / elapsed:.1f} events/s, "
+          f"{elapsed / completed * 1000:.1f} ms/file wall")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,30 @@
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
+import logging
+import pytz
+
+# Zone of the schedules' wall-clock times; naive datetimes are local times in it
+#TODO: Need to implement time zone fetch from frontend.
+LOCAL_TIMEZONE = 'America/New_York'
+
 class Event:
-    def __init__(self, name: str, start_time: datetime, end_time: datetime, location: str = None, recurrence_rule: str = None):
+    def __init__(self, name: str, start_time: datetime, end_time: datetime, location: str = None, recurrence_rule: str = None, source_bbox: tuple = None):
         self.name = name
         self.start_time = start_time
         self.end_time = end_time
         self.location = location
         self.recurrence_rule = recurrence_rule
+        # (min_x, max_x, min_y, max_y) of the words this event was parsed from, if any
+        self.source_bbox = source_bbox
 
     def __repr__(self):
         return f"Event(Name='{self.name}', Start='{self.start_time}', End='{self.end_time}', Location='{self.location}', Recurrence='{self.recurrence_rule}')"
     
     def to_ics_event(self):
         from ics import Event as IcsEvent
-        import pytz
         ics_event=IcsEvent()
         ics_event.name = self.name
 
-        #TODO: Need to implement time zone fetch from frontend. using 
-        # EST for testing.
-        local_tz=pytz.timezone('America/New_York')
+        local_tz=pytz.timezone(LOCAL_TIMEZONE)
 
         if self.start_time.tzinfo is None:
             start_time_aware=local_tz.localize(self.start_time)
@@ -43,6 +49,107 @@ class Event:
         
         return ics_event    
 
+class WeeklyEvent:
+    """One meeting of a weekly schedule, independent of any term dates.
+
+    weekday follows date.weekday() (Monday is 0) and start/end are naive local
+    times. An end time earlier than the start time means the meeting ends on the
+    following day. With tz set, dated events are localized into that zone.
+    """
+    def __init__(self, weekday: int, start: time, end: time, name: str, location: str = None, source_bbox: tuple = None, end_day_offset: int = None, tz=None):
+        self.weekday = weekday
+        self.start = start
+        self.end = end
+        self.name = name
+        self.location = location
+        self.source_bbox = source_bbox
+        if end_day_offset is None:
+            end_day_offset = 1 if end < start else 0
+        self.end_day_offset = end_day_offset
+        self.tz = tz
+
+    def __repr__(self):
+        return f"WeeklyEvent(Weekday={self.weekday}, Start='{self.start}', End='{self.end}', Name='{self.name}', Location='{self.location}')"
+
+    @classmethod
+    def from_event(cls, event: Event):
+        """Drops the date from a concrete event, keeping edits such as renamed classes or moved times."""
+        start_time, end_time, tz = event.start_time, event.end_time, None
+        if start_time.tzinfo is not None:
+            # Edited events arrive as UTC; the class meets at a fixed local time, so keep that
+            # (a UTC time of day would shift by an hour across DST, and late classes change weekday)
+            tz = pytz.timezone(LOCAL_TIMEZONE)
+            start_time = start_time.astimezone(tz)
+            end_time = end_time.astimezone(tz) if end_time.tzinfo is not None else tz.localize(end_time)
+        return cls(
+            weekday=start_time.weekday(),
+            start=start_time.time(),
+            end=end_time.time(),
+            name=event.name,
+            location=event.location,
+            source_bbox=event.source_bbox,
+            end_day_offset=(end_time.date() - start_time.date()).days,
+            tz=tz
+        )
+
+    def on(self, day: date) -> Event:
+        """Builds the concrete event for this meeting on the given day."""
+        start_time = datetime.combine(day, self.start)
+        end_time = datetime.combine(day + timedelta(days=self.end_day_offset), self.end)
+        if self.tz is not None:
+            # localize() picks the offset in effect on that date (EDT or EST)
+            start_time, end_time = self.tz.localize(start_time), self.tz.localize(end_time)
+        return Event(
+            name=self.name,
+            start_time=start_time,
+            end_time=end_time,
+            location=self.location,
+            recurrence_rule=None,
+            source_bbox=self.source_bbox
+        )
+
+def date_weekly_events(template, start_date, end_date=None):
+    """
+    Turns a weekly template into the first week of events on or after start_date.
+    Meetings whose first occurrence falls after end_date are left out.
+    """
+    events = []
+    for weekly_event in template:
+        first_occurrence = start_date + timedelta(days=(weekly_event.weekday - start_date.weekday()) % 7)
+        if end_date is not None and first_occurrence > end_date:
+            logging.debug(f"Skipping {weekly_event.name}: first occurrence {first_occurrence} is after {end_date}")
+            continue
+        events.append(weekly_event.on(first_occurrence))
+    return events
+
+def multiply_weekly_events(base_events, start_date, number_of_weeks):
+    """
+    Takes a list of events for one week and creates instances for the specified number of weeks
+    """
+    all_events = []
+    
+    for week_offset in range(number_of_weeks):
+        for base_event in base_events:
+            # Calculate the date offset for this week
+            days_offset = week_offset * 7
+            
+            # Create new datetime objects with the offset
+            new_start_time = base_event.start_time + timedelta(days=days_offset)
+            new_end_time = base_event.end_time + timedelta(days=days_offset)
+            
+            # Create a new event instance
+            new_event = Event(
+                name=base_event.name,
+                start_time=new_start_time,
+                end_time=new_end_time,
+                location=base_event.location,
+                recurrence_rule=None
+            )
+            all_events.append(new_event)
+    
+    logging.info(f"Multiplied {len(base_events)} base events into {len(all_events)} total events for {number_of_weeks} weeks")
+    return all_events
+
 # if __name__ == "__main__":
 #     start = datetime(2025, 7, 23, 16, 40)
 #     end = datetime(2025, 7, 23, 17, 40)
@@ -0,0 +1,37 @@
+"""Production launch mode. From the backend folder:
+
+    gunicorn -c gunicorn.conf.py server:app
+
+The master imports the app once (preload_app) and forks workers from it, so
+the vision/ics/dateutil imports and parser setup are paid once and shared
+copy-on-write. Each worker then creates its own Vision client and warms up in
+the background; GET /ready answers 503 until that has finished.
+"""
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 3000)}")
+# Sessions are kept in each worker's memory, so more than one worker needs
+# sticky routing in front of it (or every step of a flow may hit a different worker).
+# Calendar feeds can't be routed that way, since calendar apps poll from anywhere:
+# with more than one worker a feed 404s whenever a poll lands on another worker.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Requests mostly wait on Vision, so threads keep a worker busy while it waits
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+preload_app = True
+# gRPC channels don't survive fork(); tells server.py to leave the client to the workers
+raw_env = ['VISION_CLIENT_DEFERRED=1']
+
+
+def post_fork(server, worker):
+    from server import init_vision_client, start_warm_up
+    init_vision_client()
+    start_warm_up()
+
+
+def when_ready(server):
+    # cfg rather than the module global, so a -w on the command line counts too
+    if server.cfg.workers > 1:
+        server.log.warning(f"Running {server.cfg.workers} workers: sessions and calendar feeds are per worker, "
+                           "so shared feed URLs only work reliably with WEB_CONCURRENCY=1")
@@ -0,0 +1,208 @@
+"""Replays upload -> update -> download flows against server.py at a target rate.
+
+Flows are started on an open-loop schedule (a slow server doesn't slow the
+arrival rate down), and the report shows throughput, p50/p95/p99 latency and
+error rate per endpoint, plus the server's Vision metrics when ADMIN_TOKEN
+(or --admin-token) matches the server's:
+
+    python -m loadtest.fake_vision --port 9000 &
+    ADMIN_TOKEN=dev ADMISSION_ENABLED=0 VISION_API_ENDPOINT=localhost:9000 VISION_API_TRANSPORT=rest python server.py &
+    ADMIN_TOKEN=dev python -m loadtest.driver --target http://localhost:3000 --rps 5 --duration 60
+
+All flows come from one client, so turn admission control off (or raise
+ADMISSION_RATE) unless the per-client limits are what you're measuring.
+
+Without --images, each flow uploads random bytes. The fake Vision service maps
+them to one of its synthetic schedules.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = ['convert-schedule', 'update-events', 'downloadICS']
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.status_codes = defaultdict(lambda: defaultdict(int))
+        self.flows_started = 0
+        self.flows_completed = 0
+        self.max_start_lag = 0.0
+
+    def record(self, endpoint, seconds, status, ok):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.status_codes[endpoint][status] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def _percentile(sorted_samples, percentile):
+    if not sorted_samples:
+        return float('nan')
+    index = min(len(sorted_samples) - 1, int(round(percentile / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class FlowRunner:
+    def __init__(self, target, recorder, images, start_date, weeks, timeout):
+        self.target = target.rstrip('/')
+        self.recorder = recorder
+        self.images = images
+        self.start_date = start_date
+        self.weeks = weeks
+        self.timeout = timeout
+
+    def _call(self, endpoint, url, data=None, headers=None):
+        request = urllib.request.Request(self.target + url, data=data, headers=headers or {})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            body, status = e.read(), e.code
+        except Exception as e:
+            self.recorder.record(endpoint, time.perf_counter() - started, type(e).__name__, False)
+            return None
+        ok = 200 <= status < 300
+        self.recorder.record(endpoint, time.perf_counter() - started, status, ok)
+        return body if ok else None
+
+    def run(self):
+        image = random.choice(self.images) if self.images else os.urandom(2048)
+        body, content_type = _multipart(
+            {'startDate': self.start_date, 'numberOfWeeks': str(self.weeks)},
+            {'image': ('schedule.png', image)}
+        )
+        converted = self._call('convert-schedule', '/api/convert-schedule', body, {'Content-Type': content_type})
+        if converted is None:
+            return
+        converted = json.loads(converted)
+
+        # Simulate a user edit: rename the first class before saving
+        events = converted.get('events', [])
+        if events:
+            events[0]['name'] = events[0]['name'] + ' (edited)'
+        payload = json.dumps({'events': events, 'original_session_id': converted['session_id']}).encode()
+        updated = self._call('update-events', '/api/update-events', payload, {'Content-Type': 'application/json'})
+        if updated is None:
+            return
+
+        session_id = json.loads(updated)['session_id']
+        if self._call('downloadICS', f'/api/downloadICS?session_id={session_id}') is not None:
+            with self.recorder._lock:
+                self.recorder.flows_completed += 1
+
+
+def run_load(runner, rps, duration, concurrency):
+    interval = 1.0 / rps
+    started = time.perf_counter()
+    deadline = started + duration
+    next_start = started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while next_start < deadline:
+            now = time.perf_counter()
+            if now < next_start:
+                time.sleep(next_start - now)
+            runner.recorder.max_start_lag = max(runner.recorder.max_start_lag, time.perf_counter() - next_start)
+            pool.submit(runner.run)
+            runner.recorder.flows_started += 1
+            next_start += interval
+    return time.perf_counter() - started
+
+
+def fetch_metrics(target, timeout, admin_token):
+    if not admin_token:
+        return None
+    metrics_request = urllib.request.Request(target.rstrip('/') + '/api/metrics', headers={'X-Admin-Token': admin_token})
+    try:
+        with urllib.request.urlopen(metrics_request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except Exception:
+        return None
+
+
+def print_report(recorder, elapsed, rps, metrics=None):
+    print(f"\nTarget {rps:.1f} flows/s, started {recorder.flows_started}, completed {recorder.flows_completed} "
+          f"in {elapsed:.1f}s ({recorder.flows_completed / elapsed:.2f} flows/s)")
+    if recorder.max_start_lag > 0.1:
+        print(f"Warning: flow starts lagged up to {recorder.max_start_lag:.2f}s; raise --concurrency")
+
+    print(f"\n{'endpoint':<18}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'err %':>7}")
+    for endpoint in ENDPOINTS:
+        samples = sorted(recorder.latencies.get(endpoint, []))
+        count = len(samples)
+        errors = recorder.errors.get(endpoint, 0)
+        print(f"{endpoint:<18}{count:>9}{count / elapsed:>8.2f}"
+              f"{_percentile(samples, 50) * 1000:>9.0f}{_percentile(samples, 95) * 1000:>9.0f}"
+              f"{_percentile(samples, 99) * 1000:>9.0f}{errors:>8}{(errors / count * 100 if count else 0):>7.1f}")
+
+    for endpoint in ENDPOINTS:
+        codes = recorder.status_codes.get(endpoint)
+        if codes and set(codes) != {200}:
+            print(f"  {endpoint} status codes: {dict(codes)}")
+
+    if metrics and metrics.get('vision'):
+        vision = metrics['vision']
+        latency = vision.get('latency', {})
+        print(f"\nServer-side Vision: attempts={vision.get('attempts')} retries={vision.get('retries')} "
+              f"hedges={vision.get('hedges_sent')} limiter_rejections={vision.get('limiter_rejections')} "
+              f"p50={latency.get('p50')} p99={latency.get('p99')}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Load test the Snap Scheduli backend.")
+    arg_parser.add_argument('--target', default='http://localhost:3000')
+    arg_parser.add_argument('--rps', type=float, default=2.0, help="Flows started per second")
+    arg_parser.add_argument('--duration', type=float, default=30.0, help="Seconds to keep starting flows")
+    arg_parser.add_argument('--concurrency', type=int, default=64, help="Maximum flows in flight")
+    arg_parser.add_argument('--images', help="Folder of images to upload (default: random bytes)")
+    arg_parser.add_argument('--start-date', default='2025-08-25')
+    arg_parser.add_argument('--weeks', type=int, default=15)
+    arg_parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    arg_parser.add_argument('--admin-token', default=os.environ.get('ADMIN_TOKEN'),
+                            help="Server's ADMIN_TOKEN, to include its /api/metrics in the report (default: $ADMIN_TOKEN)")
+    args = arg_parser.parse_args(argv)
+
+    images = []
+    if args.images:
+        for name in sorted(os.listdir(args.images)):
+            path = os.path.join(args.images, name)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    images.append(f.read())
+
+    recorder = Recorder()
+    runner = FlowRunner(args.target, recorder, images, args.start_date, args.weeks, args.timeout)
+    print(f"Driving {args.target} at {args.rps} flows/s for {args.duration}s...")
+    elapsed = run_load(runner, args.rps, args.duration, args.concurrency)
+    print_report(recorder, elapsed, args.rps, fetch_metrics(args.target, args.timeout, args.admin_token))
+
+
+if __name__ == '__main__':
+    main()
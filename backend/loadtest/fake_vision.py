@@ -0,0 +1,161 @@
+"""Local stand-in for the Vision images:annotate REST API.
+
+Serves recorded or synthetic annotations with a configurable latency distribution
+and error rate, so the backend can be load tested without Google Vision:
+
+    python -m loadtest.fake_vision --port 9000 --latency lognormal:0.4,0.5 --error-rate 0.02
+    VISION_API_ENDPOINT=localhost:9000 VISION_API_TRANSPORT=rest python server.py
+
+Recorded annotations are .json files holding either a full AnnotateImageResponse
+or just its fullTextAnnotation. The same image bytes always get the same
+annotation, so repeated uploads behave like the real API.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from SyntheticSchedule import synthetic_annotation
+
+
+class LatencyModel:
+    """Parses 'fixed:S', 'uniform:LO,HI' or 'lognormal:MEDIAN,SIGMA' (seconds) and samples delays."""
+
+    def __init__(self, spec='fixed:0'):
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',')] if params else []
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            return self.params[0] if self.params else 0.0
+        if self.kind == 'uniform':
+            return rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return median * math.exp(sigma * rng.gauss(0, 1))
+
+
+class FakeVisionService:
+    def __init__(self, latency='fixed:0', error_rate=0.0, recordings_dir=None, synthetic_variants=50, seed=None):
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+        self.synthetic_variants = synthetic_variants
+        self.recordings = self._load_recordings(recordings_dir) if recordings_dir else []
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._synthetic_cache = {}
+        self.stats = {'requests': 0, 'errors': 0}
+
+    def _load_recordings(self, recordings_dir):
+        recordings = []
+        for name in sorted(os.listdir(recordings_dir)):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(recordings_dir, name), encoding='utf-8') as f:
+                data = json.load(f)
+            recordings.append(data.get('fullTextAnnotation', data))
+        logging.info(f"Loaded {len(recordings)} recorded annotations from {recordings_dir}")
+        return recordings
+
+    def annotation_for(self, content: bytes) -> dict:
+        key = int.from_bytes(hashlib.sha256(content).digest()[:8], 'big')
+        if self.recordings:
+            return self.recordings[key % len(self.recordings)]
+        variant = key % self.synthetic_variants
+        if variant not in self._synthetic_cache:
+            self._synthetic_cache[variant] = synthetic_annotation(seed=variant)
+        return self._synthetic_cache[variant]
+
+    def next_outcome(self):
+        """Returns (delay seconds, should fail)."""
+        with self._rng_lock:
+            delay, fail = max(0.0, self.latency.sample(self._rng)), self._rng.random() < self.error_rate
+            self.stats['requests'] += 1
+            self.stats['errors'] += int(fail)
+        return delay, fail
+
+
+def make_handler(service: FakeVisionService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            raw = self.rfile.read(length)
+            if self.path.split('?')[0] != '/v1/images:annotate':
+                self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+                return
+
+            delay, fail = service.next_outcome()
+            time.sleep(delay)
+            if fail:
+                self._send_json(503, {'error': {'code': 503, 'message': 'Injected failure', 'status': 'UNAVAILABLE'}})
+                return
+
+            try:
+                requests = json.loads(raw).get('requests', [])
+            except ValueError:
+                self._send_json(400, {'error': {'code': 400, 'message': 'Invalid JSON', 'status': 'INVALID_ARGUMENT'}})
+                return
+
+            responses = []
+            for item in requests:
+                content = base64.b64decode(item.get('image', {}).get('content', ''))
+                responses.append({'fullTextAnnotation': service.annotation_for(content)})
+            self._send_json(200, {'responses': responses})
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=9000, **kwargs):
+    service = FakeVisionService(**kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    logging.info(f"Fake Vision service listening on http://{host}:{port}")
+    return server, service
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Local stand-in for the Google Vision REST API.")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=9000)
+    arg_parser.add_argument('--latency', default='lognormal:0.4,0.4',
+                            help="fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA (seconds)")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    arg_parser.add_argument('--recordings', help="Folder of recorded annotation .json files (default: synthetic)")
+    arg_parser.add_argument('--seed', type=int, help="Seed for latency and error sampling")
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    server, _ = serve(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                      recordings_dir=args.recordings, seed=args.seed)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
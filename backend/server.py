@@ -1,17 +1,31 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, url_for
 from flask_cors import CORS
 import os
+import hmac
+import hashlib
+import secrets
 import io
+import threading
+import time
 from datetime import datetime, timedelta
-from google.cloud import vision
-from dateutil import parser as date_parser
-from ics import Calendar, Event as IcsEvent
-import re
+from PIL import Image
 import logging
+from contextlib import nullcontext
 from OCRService import OCRService
 from ScheduleParser import ScheduleParser
 from ICSExporter import ICSExporter
-from event import Event
+from event import Event, WeeklyEvent, date_weekly_events, multiply_weekly_events
+from TimeParser import TimeParser
+from ApiResponse import dumps, json_response, json_array_response, file_response
+from CalendarFeed import CalendarFeed
+from ScheduleAnalyzer import ScheduleAnalyzer
+from ScheduleTemplateCache import ScheduleTemplateCache
+from ImageStore import ImageStore
+from SingleFlight import SingleFlight, SingleFlightTimeout
+from Profiler import RuntimeProfiler
+from AdmissionControl import AdmissionController, AdmissionRejected
+from VisionClient import ResilientVisionClient, VisionQuotaExceeded, create_vision_client
+from SyntheticSchedule import synthetic_annotation
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -22,46 +36,184 @@ app = Flask(__name__)
 CORS(app, origins=["http://localhost:8081"], supports_credentials=True, allow_headers="*")
 
 #initialize Google Cloud Vision Client
-vision_client = None
-try:
-    vision_client = vision.ImageAnnotatorClient()
-    logging.info("Google Cloud Vision client initialized successfully.")
-except Exception as e:
-    logging.error(f"Failed to initialize Google Cloud Vision client: {e}")
-    vision_client = None
+def create_resilient_vision_client():
+    try:
+        # Deadlines, retries, hedging and the concurrency limit are configured via VISION_* env vars
+        client = ResilientVisionClient.from_env(create_vision_client())
+        logging.info("Google Cloud Vision client initialized successfully.")
+        return client
+    except Exception as e:
+        logging.error(f"Failed to initialize Google Cloud Vision client: {e}")
+        return None
+
+# gRPC channels don't survive fork(), so a preloading master (see gunicorn.conf.py)
+# leaves the client for each worker to create in init_vision_client()
+vision_client = None if os.environ.get('VISION_CLIENT_DEFERRED') == '1' else create_resilient_vision_client()
 
 # Initialize service classes
 ocr_service_instance = OCRService(vision_client)
 schedule_parser_instance = ScheduleParser()
 ics_exporter_instance = ICSExporter()
+time_parser_instance = TimeParser()
+schedule_analyzer_instance = ScheduleAnalyzer()
+runtime_profiler = RuntimeProfiler()
+template_cache = ScheduleTemplateCache(int(os.environ.get('TEMPLATE_CACHE_SIZE', 256)))
+# Original uploads for region re-OCR; sessions only keep the image hash
+image_store = ImageStore(int(os.environ.get('IMAGE_STORE_MB', 256)) * 1024 * 1024)
+# Concurrent uploads of the same image share one OCR call and parse
+conversion_flight = SingleFlight()
+conversion_wait_timeout = float(os.environ.get('CONVERSION_WAIT_TIMEOUT', 30.0))
+
+# Per-client rate limiting and the OCR concurrency cap run before anything else
+admission_controller = AdmissionController.from_env()
+if admission_controller:
+    app.before_request(admission_controller.before_request)
+    app.teardown_request(admission_controller.teardown_request)
+
+# Profiling hooks are no-ops until a capture is started from the /admin/profile endpoints
+app.before_request(runtime_profiler.before_request)
+app.after_request(runtime_profiler.after_request)
 
-def multiply_weekly_events(base_events, start_date, number_of_weeks):
+# Set once warm_up() has run in this process; /ready reports 503 until then
+worker_ready = threading.Event()
+
+def init_vision_client():
     """
-    Takes a list of events for one week and creates instances for the specified number of weeks
+    Creates this process's Vision client if the import deferred it
     """
-    all_events = []
-    
-    for week_offset in range(number_of_weeks):
-        for base_event in base_events:
-            # Calculate the date offset for this week
-            days_offset = week_offset * 7
-            
-            # Create new datetime objects with the offset
-            new_start_time = base_event.start_time + timedelta(days=days_offset)
-            new_end_time = base_event.end_time + timedelta(days=days_offset)
-            
-            # Create a new event instance
-            new_event = Event(
-                name=base_event.name,
-                start_time=new_start_time,
-                end_time=new_end_time,
-                location=base_event.location,
-                recurrence_rule=None
-            )
-            all_events.append(new_event)
-    
-    logging.info(f"Multiplied {len(base_events)} base events into {len(all_events)} total events for {number_of_weeks} weeks")
-    return all_events
+    global vision_client
+    if vision_client is None:
+        vision_client = create_resilient_vision_client()
+        ocr_service_instance.client = vision_client
+
+def warm_up():
+    """
+    Connects to Vision and runs a tiny synthetic schedule through parsing, dating,
+    ICS export and JSON encoding so the first real request doesn't pay for it
+    """
+    started = time.perf_counter()
+    init_vision_client()
+    if vision_client and not vision_client.warm_up(float(os.environ.get('WARMUP_VISION_TIMEOUT', 5.0))):
+        logging.warning("Vision channel did not connect during warm-up; the first OCR request will connect it.")
+
+    try:
+        template, _ = schedule_parser_instance.parse_template(synthetic_annotation(seed=0, classes_per_day=(1, 1)))
+        start_date = datetime.now().date()
+        events = multiply_weekly_events(date_weekly_events(template, start_date), start_date, 1)
+        ICSExporter().generate_ics(events, stable_uids=True)
+        dumps({"events": events_to_json(events)})
+    except Exception as e:
+        # A failed warm-up only means the first request is slow again; don't keep the worker out of rotation
+        logging.exception(f"Warm-up parse/export failed: {e}")
+
+    worker_ready.set()
+    logging.info(f"Worker {os.getpid()} warmed up in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+def start_warm_up():
+    # Runs in the background so /ready can answer while the worker warms up
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+def expand_session_events(session_id):
+    """
+    Returns every event of a stored session across all of its weeks
+    """
+    base_events = app.config[f'events_{session_id}']
+    number_of_weeks = app.config.get(f'weeks_{session_id}', 1)
+    start_date_str = app.config.get(f'start_date_{session_id}', None)
+    start_date = time_parser_instance.parse_date(start_date_str) if start_date_str else None
+    return multiply_weekly_events(base_events, start_date, number_of_weeks)
+
+def render_session_ics(session_id):
+    """
+    Renders the full multi-week calendar for a stored session
+    """
+    return ICSExporter().generate_ics(expand_session_events(session_id), stable_uids=True)
+
+calendar_feed = CalendarFeed(render_session_ics, max_entries=int(os.environ.get('CALENDAR_FEED_CACHE_SIZE', 1024)))
+
+def copy_session_metadata(source_session_id, target_session_id):
+    """
+    Carries everything but the events over to a new session id
+    """
+    for key in ('weeks', 'start_date', 'layout', 'image_hash'):
+        if f'{key}_{source_session_id}' in app.config:
+            app.config[f'{key}_{target_session_id}'] = app.config[f'{key}_{source_session_id}']
+
+    # Keep an existing subscription feed URL pointing at the latest edit
+    feed_token = app.config.get(f'feed_token_{source_session_id}')
+    if feed_token:
+        app.config[f'feed_token_{target_session_id}'] = feed_token
+        app.config[f'feed_{feed_token}'] = target_session_id
+
+def events_to_json(events):
+    """
+    Event list for JSON responses; datetimes are left as objects and encoded in ISO format
+    """
+    return [{
+        'id': id(event),  # Use object id as temporary identifier
+        'name': event.name,
+        'startTime': event.start_time,
+        'endTime': event.end_time,
+        'location': event.location or '',
+        'allDay': False,
+        # Echoed back by the editor so region re-OCR can still tell which events a region covers
+        'sourceBbox': list(event.source_bbox) if event.source_bbox else None
+    } for event in events]
+
+def ocr_and_parse_template(image_content, image_hash):
+    """
+    OCRs an image and parses it into a weekly template, caching non-empty results
+    """
+    # Only the upload that actually calls Vision pays for OCR and holds an in-flight slot
+    admission = admission_controller.ocr_admission() if admission_controller else nullcontext()
+    #Perform OCR
+    with admission, runtime_profiler.stage('ocr'):
+        raw_text=ocr_service_instance.process_image(image_content)
+    if runtime_profiler.capturing:
+        runtime_profiler.tag(word_count=len(raw_text.text.split()) if raw_text else 0)
+    logging.info("OCR Service returned raw text.")
+
+    with runtime_profiler.stage('parse'):
+        template, layout = schedule_parser_instance.parse_template(raw_text)
+    # An empty result may be a bad photo; let the user retry it
+    if template:
+        template_cache.put(image_hash, template, layout)
+    return template, layout
+
+def parse_source_bbox(value):
+    """
+    Reads a sourceBbox sent back by the editor; anything malformed just leaves the event untracked
+    """
+    if not isinstance(value, (list, tuple)) or len(value) != 4:
+        return None
+    try:
+        return tuple(float(coordinate) for coordinate in value)
+    except (TypeError, ValueError):
+        return None
+
+def splice_region_events(existing_events, region_events, region):
+    """
+    Replaces the events that came from a re-OCR'd region with the newly parsed ones.
+    Events with a known source box are replaced if their box centre lies in the region;
+    edited events (no source box) are replaced if they overlap a new event in time.
+    """
+    x_start, y_start, x_end, y_end = region
+
+    def from_region(event):
+        min_x, max_x, min_y, max_y = event.source_bbox
+        return x_start <= (min_x + max_x) / 2 <= x_end and y_start <= (min_y + max_y) / 2 <= y_end
+
+    replaced = {id(event) for event in existing_events if event.source_bbox and from_region(event)}
+    untracked = [event for event in existing_events if not event.source_bbox]
+    new_ids = {id(event) for event in region_events}
+    for first, second in schedule_analyzer_instance.find_conflicts(untracked + region_events):
+        if id(first) in new_ids and id(second) not in new_ids:
+            replaced.add(id(second))
+        elif id(second) in new_ids and id(first) not in new_ids:
+            replaced.add(id(first))
+
+    kept = [event for event in existing_events if id(event) not in replaced]
+    return kept + region_events, len(existing_events) - len(kept)
 
 @app.route('/api/convert-schedule', methods=['POST'])
 #main function logic to parse requests from app and 
@@ -77,23 +229,40 @@ def convert_picture_to_ics():
         logging.warning("No selected file name.")
         return jsonify({"error": "No selected file."}), 400
     
-    if not vision_client:
-        logging.error("OCR service not initialized. Cannot process request.")
-        return jsonify({"error": "Backend OCR service not configured. Please check server logs."}), 500
-
     try:
         #Read content
         image_content=file.read()
+        image_hash = hashlib.sha256(image_content).hexdigest()
         logging.info(f"File recieved: {file.filename}. Size: {len(image_content)} bytes.")
-        #Perform OCR
-        raw_text=ocr_service_instance.process_image(image_content)
-        logging.info("OCR Service returned raw text.")
-        #Parse text into event objects
-        logging.info("Parsing raw text into event objects...")
-        #define recurrence rule (if applicable)
-        
-        raw_text=ocr_service_instance.process_image(image_content)
-        logging.info('OCR Service returned raw text.')
+        runtime_profiler.tag(image_hash=image_hash[:16], image_bytes=len(image_content))
+
+        # The weekly template only depends on the image, so a re-upload skips OCR and parsing
+        cached = template_cache.get(image_hash)
+        if cached:
+            template, layout = cached
+            logging.info(f"Reusing parsed template for image {image_hash[:16]} ({len(template)} entries)")
+        else:
+            if not vision_client:
+                logging.error("OCR service not initialized. Cannot process request.")
+                return jsonify({"error": "Backend OCR service not configured. Please check server logs."}), 500
+
+            # The first upload of an image does the work; identical uploads arriving meanwhile wait for it
+            def convert():
+                return conversion_flight.do(
+                    image_hash, lambda: ocr_and_parse_template(image_content, image_hash), conversion_wait_timeout
+                )
+            with runtime_profiler.stage('ocr_and_parse'):
+                try:
+                    (template, layout), shared = convert()
+                except AdmissionRejected as e:
+                    # We waited on another client's upload and that client was turned away; go again on our own budget
+                    if e.client_key == admission_controller.client_key():
+                        raise
+                    (template, layout), shared = convert()
+            if shared:
+                logging.info(f"Shared in-flight conversion of image {image_hash[:16]} ({len(template)} entries)")
+            runtime_profiler.tag(coalesced=shared)
+        runtime_profiler.tag(template_cached=bool(cached))
         
         # Get start date and number of weeks from request
         today=datetime.now().date()
@@ -102,7 +271,7 @@ def convert_picture_to_ics():
 
         if 'startDate' in request.form:
             try: 
-                schedule_start = date_parser.parse(request.form['startDate']).date() 
+                schedule_start = time_parser_instance.parse_date(request.form['startDate'])
                 logging.info(f"Using provided start date: {schedule_start}")
             except Exception as e: 
                 logging.warning(f"Failed to parse startDate: {e}, using default")
@@ -120,31 +289,39 @@ def convert_picture_to_ics():
         schedule_end = schedule_start + timedelta(weeks=number_of_weeks)
         logging.info(f"Schedule range: {schedule_start} to {schedule_end} ({number_of_weeks} weeks)")
 
-        events=schedule_parser_instance.parse_text(raw_text, schedule_start_date=schedule_start, schedule_end_date=schedule_end)
-
-        events_json= []
-        for event in events:
-            events_json.append({
-                'id': id(event),  # Use object id as temporary identifier
-                'name': event.name,
-                'startTime': event.start_time.isoformat(),
-                'endTime': event.end_time.isoformat(),
-                'location': event.location or '',
-                'allDay': False
-            })
-        
+        with runtime_profiler.stage('date'):
+            events = date_weekly_events(template, schedule_start, schedule_end)
+        runtime_profiler.tag(event_count=len(events))
+
         session_id=os.urandom(16).hex()
         app.config[f'events_{session_id}'] = events
         app.config[f'weeks_{session_id}'] = number_of_weeks
         app.config[f'start_date_{session_id}'] = schedule_start.isoformat()
+        # Kept so a misread region can be re-OCR'd later without a new upload
+        app.config[f'layout_{session_id}'] = layout
+        app.config[f'image_hash_{session_id}'] = image_hash
+        image_store.put(image_hash, image_content)
 
-        return jsonify({
+        return json_array_response({
             "success": True,
-            "events": events_json,
             "session_id": session_id,
             "number_of_weeks": number_of_weeks,
             "start_date": schedule_start.isoformat()
-        })
+        }, "events", events_to_json(events))
+
+    except VisionQuotaExceeded as e:
+        logging.warning(f"Vision API concurrency limit reached: {e}")
+        return jsonify({"error": "OCR service is busy, please try again shortly."}), 503
+
+    except AdmissionRejected as e:
+        return admission_controller.rejection_response(e)
+
+    except SingleFlightTimeout as e:
+        logging.warning(f"Gave up waiting on a shared conversion: {e}")
+        response = jsonify({"error": "This schedule is still being processed, please try again shortly."})
+        response.status_code = 503
+        response.headers['Retry-After'] = '2'
+        return response
 
     except Exception as e:
         logging.exception(f"An unexpected error has occured during processing: {e}")
@@ -205,7 +382,8 @@ def update_events():
                     start_time=start_time,
                     end_time=end_time,
                     location=event_data.get('location',''),
-                    recurrence_rule=None
+                    recurrence_rule=None,
+                    source_bbox=parse_source_bbox(event_data.get('sourceBbox'))
                 )
                 
                 logging.info(f"   ✅ Created Event object:")
@@ -232,10 +410,7 @@ def update_events():
         # Preserve the original session's week and start date info if available
         original_session_id = request.json.get('original_session_id')
         if original_session_id:
-            if f'weeks_{original_session_id}' in app.config:
-                app.config[f'weeks_{session_id}'] = app.config[f'weeks_{original_session_id}']
-            if f'start_date_{original_session_id}' in app.config:
-                app.config[f'start_date_{session_id}'] = app.config[f'start_date_{original_session_id}']
+            copy_session_metadata(original_session_id, session_id)
 
         return jsonify({
             "success": True,
@@ -247,6 +422,142 @@ def update_events():
         logging.exception(f"Error updating events: {e}")
         return jsonify({"error": f"Update error: {str(e)}"}), 500
 
+@app.route('/api/reocr-region', methods=['POST'])
+def reocr_region():
+    # Re-OCRs one region of the original upload and splices the result into the session
+    session_id = request.form.get('session_id')
+    if not session_id or f'events_{session_id}' not in app.config:
+        logging.error(f"No events found for session ID: {session_id}")
+        return jsonify({"error": "No events found for this session"}), 404
+
+    layout = app.config.get(f'layout_{session_id}')
+    if not layout:
+        return jsonify({"error": "This session has no layout to re-parse against. Please re-upload the image."}), 409
+
+    if not vision_client:
+        logging.error("OCR service not initialized. Cannot process request.")
+        return jsonify({"error": "Backend OCR service not configured. Please check server logs."}), 500
+
+    try:
+        # Region is given in pixel coordinates of the original image
+        x, y = int(request.form['x']), int(request.form['y'])
+        width, height = int(request.form['width']), int(request.form['height'])
+        if width <= 0 or height <= 0:
+            raise ValueError("width and height must be positive")
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid region: {e}"}), 400
+
+    try:
+        if 'image' in request.files and request.files['image'].filename:
+            # The client already cropped the region; x/y give its offset in the original
+            crop_content = request.files['image'].read()
+            region = (x, y, x + width, y + height)
+        elif f'image_hash_{session_id}' in app.config:
+            original_content = image_store.get(app.config[f'image_hash_{session_id}'])
+            if original_content is None:
+                return jsonify({"error": "The original image is no longer kept; upload the cropped region or the full image again"}), 409
+            with Image.open(io.BytesIO(original_content)) as original:
+                box = (max(0, x), max(0, y), min(original.width, x + width), min(original.height, y + height))
+                if box[0] >= box[2] or box[1] >= box[3]:
+                    return jsonify({"error": "Region lies outside the original image"}), 400
+                # Only what was actually cropped is replaced; the box is clipped to the image
+                x, y = box[0], box[1]
+                region = box
+                buffer = io.BytesIO()
+                original.crop(box).save(buffer, format='PNG')
+                crop_content = buffer.getvalue()
+        else:
+            return jsonify({"error": "No original image stored for this session; upload the cropped region"}), 400
+
+        logging.info(f"Re-OCR of region {region} for session {session_id}: {len(crop_content)} bytes")
+        with runtime_profiler.stage('ocr'):
+            region_text = ocr_service_instance.process_image(crop_content)
+
+        # Shift the crop's words back into the original image's coordinate space
+        region_words = []
+        if region_text and region_text.pages:
+            for word in schedule_parser_instance.extract_words(region_text):
+                min_x, max_x, min_y, max_y = word['bbox']
+                region_words.append({'text': word['text'], 'bbox': (min_x + x, max_x + x, min_y + y, max_y + y)})
+
+        number_of_weeks = app.config.get(f'weeks_{session_id}', 1)
+        start_date_str = app.config.get(f'start_date_{session_id}')
+        schedule_start = time_parser_instance.parse_date(start_date_str) if start_date_str else datetime.now().date()
+        schedule_end = schedule_start + timedelta(weeks=number_of_weeks)
+        with runtime_profiler.stage('parse'):
+            region_events = schedule_parser_instance.parse_words(region_words, layout, schedule_start, schedule_end)
+
+        events, replaced_count = splice_region_events(
+            app.config[f'events_{session_id}'], region_events, region
+        )
+        logging.info(f"Region re-OCR replaced {replaced_count} events with {len(region_events)} new ones")
+
+        new_session_id = os.urandom(16).hex()
+        app.config[f'events_{new_session_id}'] = events
+        copy_session_metadata(session_id, new_session_id)
+
+        return json_array_response({
+            "success": True,
+            "session_id": new_session_id,
+            "replaced": replaced_count,
+            "added": len(region_events),
+            "number_of_weeks": number_of_weeks,
+            "start_date": schedule_start.isoformat()
+        }, "events", events_to_json(events))
+
+    except VisionQuotaExceeded as e:
+        logging.warning(f"Vision API concurrency limit reached: {e}")
+        return jsonify({"error": "OCR service is busy, please try again shortly."}), 503
+
+    except Exception as e:
+        logging.exception(f"Error re-processing region: {e}")
+        return jsonify({"error": f"Processing error: {str(e)}"}), 500
+
+@app.route('/api/redate', methods=['POST'])
+def redate():
+    # Moves a session to a new start date and/or week count without OCR'ing again
+    data = request.get_json(silent=True) or request.form
+    session_id = data.get('session_id')
+    if not session_id or f'events_{session_id}' not in app.config:
+        logging.error(f"No events found for session ID: {session_id}")
+        return jsonify({"error": "No events found for this session"}), 404
+
+    try:
+        number_of_weeks = int(data.get('numberOfWeeks', app.config.get(f'weeks_{session_id}', 1)))
+        if number_of_weeks < 1:
+            raise ValueError("numberOfWeeks must be at least 1")
+        if data.get('startDate'):
+            schedule_start = time_parser_instance.parse_date(data['startDate'])
+        else:
+            start_date_str = app.config.get(f'start_date_{session_id}')
+            schedule_start = time_parser_instance.parse_date(start_date_str) if start_date_str else datetime.now().date()
+    except (ValueError, TypeError, OverflowError) as e:
+        return jsonify({"error": f"Invalid term parameters: {e}"}), 400
+
+    try:
+        schedule_end = schedule_start + timedelta(weeks=number_of_weeks)
+        # Built from the session's current events so edits made in the editor carry over
+        template = [WeeklyEvent.from_event(event) for event in app.config[f'events_{session_id}']]
+        events = date_weekly_events(template, schedule_start, schedule_end)
+        logging.info(f"Re-dated {len(events)} events of session {session_id} to {schedule_start} for {number_of_weeks} weeks")
+
+        new_session_id = os.urandom(16).hex()
+        app.config[f'events_{new_session_id}'] = events
+        copy_session_metadata(session_id, new_session_id)
+        app.config[f'weeks_{new_session_id}'] = number_of_weeks
+        app.config[f'start_date_{new_session_id}'] = schedule_start.isoformat()
+
+        return json_array_response({
+            "success": True,
+            "session_id": new_session_id,
+            "number_of_weeks": number_of_weeks,
+            "start_date": schedule_start.isoformat()
+        }, "events", events_to_json(events))
+
+    except Exception as e:
+        logging.exception(f"Error re-dating session: {e}")
+        return jsonify({"error": f"Re-date error: {str(e)}"}), 500
+
 @app.route('/api/accessEditor', methods=['GET'])
 def accessEditor():
     # This route can be used to access the editor page
@@ -277,13 +588,14 @@ def downloadICS():
         
         # Get the start date for proper calculation
         if start_date_str:
-            start_date = date_parser.parse(start_date_str).date()
+            start_date = time_parser_instance.parse_date(start_date_str)
         else:
             # Fallback to the first event's date if no start date stored
             start_date = base_events[0].start_time.date() if base_events else datetime.now().date()
         
         # Multiply the base events for the full schedule
-        all_events = multiply_weekly_events(base_events, start_date, number_of_weeks)
+        with runtime_profiler.stage('multiply'):
+            all_events = multiply_weekly_events(base_events, start_date, number_of_weeks)
         
         # Log the multiplied events to see if times are preserved
         logging.info(f"🗂️ DOWNLOAD ICS: Generated {len(all_events)} total events for download")
@@ -293,7 +605,8 @@ def downloadICS():
             logging.info(f"   🕐 End: {event.end_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
 
         exporter = ICSExporter()
-        ics_content = exporter.generate_ics(all_events)
+        with runtime_profiler.stage('export'):
+            ics_content = exporter.generate_ics(all_events)
         logging.info(f"🗂️ DOWNLOAD ICS: Generated ICS content with {len(ics_content)} characters")
         
         # Log a snippet of the ICS content to see the actual times
@@ -302,27 +615,221 @@ def downloadICS():
             cs_lines = [line for line in lines if 'CS 3093C' in line or 'DTSTART' in line or 'DTEND' in line]
             logging.info(f"🗂️ CS 3093C ICS snippet: {cs_lines[:10]}")
 
-        buffer = io.BytesIO()
-        buffer.write(ics_content.encode('utf-8'))
-        buffer.seek(0)
-
-        # Send the file for download
-        return send_file(
-            buffer,
-            mimetype='text/calendar',
-            as_attachment=True,
-            download_name='schedule.ics'
-        )
+        # Send the file for download, compressed if the client accepts it
+        return file_response(ics_content.encode('utf-8'), 'text/calendar', 'schedule.ics')
 
     except Exception as e: 
         logging.exception(f"Error generating ICS file: {e}")
         return jsonify({"error": f"Download error: {str(e)}"}), 500
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Load balancers should only send traffic once this worker has warmed up
+    if not worker_ready.is_set():
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True, "vision": vision_client is not None}), 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    if not admin_authorized():
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({
+        # None until the worker has a Vision client (or if it has none at all)
+        "vision": vision_client.metrics() if vision_client else None,
+        "template_cache": template_cache.metrics(),
+        "conversion_flight": conversion_flight.metrics(),
+        "image_store": image_store.metrics(),
+        "admission_rejections": admission_controller.rejections if admission_controller else None
+    }), 200
+
+
+MAX_FREEBUSY_DAYS = 366
+
+@app.route('/api/freebusy', methods=['POST'])
+def freebusy():
+    # Shared free time and per-schedule conflicts across several sessions
+    try:
+        data = request.get_json(silent=True) or {}
+        session_ids = data.get('session_ids', [])
+        if not session_ids:
+            return jsonify({"error": "No session ids provided"}), 400
+        if not isinstance(session_ids, list) or not all(isinstance(sid, str) for sid in session_ids):
+            return jsonify({"error": "session_ids must be a list of session id strings"}), 400
+
+        missing = [sid for sid in session_ids if f'events_{sid}' not in app.config]
+        found = [sid for sid in session_ids if f'events_{sid}' in app.config]
+        if not found:
+            return jsonify({"error": "No events found for the given sessions", "missing_session_ids": missing}), 404
+
+        event_lists = [expand_session_events(sid) for sid in found]
+        busy = schedule_analyzer_instance.merge_busy(event_lists)
+
+        try:
+            # Default window covers every day any of the schedules touches
+            if data.get('start'):
+                window_start = time_parser_instance.parse_date(data['start'])
+            else:
+                window_start = busy[0][0].date() if busy else datetime.now().date()
+            if data.get('end'):
+                window_end = time_parser_instance.parse_date(data['end'])
+            else:
+                window_end = max(end for _, end in busy).date() if busy else window_start
+            if window_end < window_start:
+                raise ValueError("end is before start")
+            # free_slots walks the window a day at a time
+            if (window_end - window_start).days >= MAX_FREEBUSY_DAYS:
+                raise ValueError(f"the window may span at most {MAX_FREEBUSY_DAYS} days")
+
+            day_start = time_parser_instance.parse_time(str(data.get('dayStart', '8:00AM')))
+            day_end = time_parser_instance.parse_time(str(data.get('dayEnd', '10:00PM')))
+            if day_end <= day_start:
+                raise ValueError("dayEnd must be after dayStart")
+            min_duration = timedelta(minutes=int(data.get('minDuration', 30)))
+            if min_duration <= timedelta(0):
+                raise ValueError("minDuration must be positive")
+        except (ValueError, TypeError, OverflowError) as e:
+            return jsonify({"error": f"Invalid free/busy parameters: {e}"}), 400
+
+        free = schedule_analyzer_instance.free_slots(busy, window_start, window_end, day_start, day_end, min_duration)
+        window_open = datetime.combine(window_start, datetime.min.time())
+        window_close = datetime.combine(window_end + timedelta(days=1), datetime.min.time())
+        busy = [(start, end) for start, end in busy if end > window_open and start < window_close]
+
+        conflicts = {}
+        for sid in found:
+            # Weeks are copies of the base week, so its conflicts repeat every week
+            pairs = schedule_analyzer_instance.find_conflicts(app.config[f'events_{sid}'])
+            conflicts[sid] = [
+                [{'name': e.name, 'startTime': e.start_time, 'endTime': e.end_time,
+                  'location': e.location or ''} for e in pair]
+                for pair in pairs
+            ]
+
+        logging.info(f"Free/busy for {len(found)} sessions: {len(busy)} busy blocks, {len(free)} free slots")
+        return json_response({
+            "success": True,
+            "window": {"start": window_start, "end": window_end},
+            "busy": [{'startTime': start, 'endTime': end} for start, end in busy],
+            "free": [{'startTime': start, 'endTime': end} for start, end in free],
+            "conflicts": conflicts,
+            "missing_session_ids": missing
+        }, 200)
+
+    except Exception as e:
+        logging.exception(f"Error computing free/busy: {e}")
+        return jsonify({"error": f"Free/busy error: {str(e)}"}), 500
+
+
 @app.route('/api/shareICS', methods=['POST'])
 def shareICS():
-    # This route can be used to share the ICS file
-    return jsonify({"message": "Sharing ICS file"}), 200
+    # Returns a stable subscription URL for the session's calendar
+    data = request.get_json(silent=True) or request.form
+    session_id = data.get('session_id') or request.args.get('session_id')
+    if not session_id or f'events_{session_id}' not in app.config:
+        logging.error(f"No events found for session ID: {session_id}")
+        return jsonify({"error": "No events found to share"}), 404
+
+    feed_token = app.config.get(f'feed_token_{session_id}')
+    if not feed_token:
+        feed_token = secrets.token_urlsafe(16)
+        app.config[f'feed_token_{session_id}'] = feed_token
+        app.config[f'feed_{feed_token}'] = session_id
+        logging.info(f"Created calendar feed {feed_token} for session ID {session_id}")
+
+    feed_url = url_for('calendarFeed', token=feed_token, _external=True)
+    return jsonify({
+        "success": True,
+        "feed_url": feed_url,
+        "webcal_url": "webcal://" + feed_url.split("://", 1)[1]
+    }), 200
+
+
+@app.route('/api/feed/<token>.ics', methods=['GET'])
+def calendarFeed(token):
+    session_id = app.config.get(f'feed_{token}')
+    if not session_id or f'events_{session_id}' not in app.config:
+        return jsonify({"error": "Calendar feed not found"}), 404
+
+    try:
+        return calendar_feed.make_response(token, session_id, request)
+    except Exception as e:
+        logging.exception(f"Error rendering calendar feed {token}: {e}")
+        return jsonify({"error": f"Feed error: {str(e)}"}), 500
+
+def admin_authorized():
+    # Admin endpoints are disabled entirely unless ADMIN_TOKEN is set
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    provided = request.headers.get('X-Admin-Token', '')
+    return bool(admin_token) and hmac.compare_digest(provided.encode(), admin_token.encode())
+
+
+@app.route('/admin/profile', methods=['GET'])
+def profileStatus():
+    if not admin_authorized():
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(runtime_profiler.status()), 200
+
+
+@app.route('/admin/profile/<kind>/<action>', methods=['POST'])
+def profileControl(kind, action):
+    if not admin_authorized():
+        return jsonify({"error": "Not found"}), 404
+
+    options = request.get_json(silent=True) or {}
+    try:
+        if kind == 'memory' and action == 'start':
+            runtime_profiler.start_memory(frames=int(options.get('frames', 10)))
+        elif kind == 'memory' and action == 'stop':
+            runtime_profiler.stop_memory()
+        elif kind == 'cpu' and action == 'start':
+            requests_limit = options.get('requests')
+            runtime_profiler.start_cpu(seconds=float(options.get('seconds', 30)),
+                                       max_requests=int(requests_limit) if requests_limit else None)
+        elif kind == 'cpu' and action == 'stop':
+            runtime_profiler.stop_cpu()
+        elif kind == 'slow' and action == 'start':
+            runtime_profiler.start_slow(keep=int(options.get('keep', 20)),
+                                        threshold_ms=float(options.get('threshold_ms', 0)))
+        elif kind == 'slow' and action == 'stop':
+            runtime_profiler.stop_slow()
+        else:
+            return jsonify({"error": f"Unknown profiling action: {kind}/{action}"}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid profiling options: {e}"}), 400
+
+    return jsonify(runtime_profiler.status()), 200
+
+
+@app.route('/admin/profile/<kind>', methods=['GET'])
+def profileReport(kind):
+    if not admin_authorized():
+        return jsonify({"error": "Not found"}), 404
+
+    if kind == 'memory':
+        group_by = request.args.get('group_by', 'lineno')
+        if group_by not in RuntimeProfiler.MEMORY_GROUPINGS:
+            return jsonify({"error": f"Invalid group_by '{group_by}'; use one of {', '.join(RuntimeProfiler.MEMORY_GROUPINGS)}"}), 400
+        return jsonify(runtime_profiler.memory_report(
+            limit=request.args.get('limit', 20, type=int),
+            group_by=group_by,
+            reset_baseline=request.args.get('reset') == '1'
+        )), 200
+    if kind == 'cpu':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in RuntimeProfiler.CPU_SORT_KEYS:
+            return jsonify({"error": f"Invalid sort '{sort}'; use one of {', '.join(RuntimeProfiler.CPU_SORT_KEYS)}"}), 400
+        report = runtime_profiler.cpu_report(
+            limit=request.args.get('limit', 30, type=int),
+            sort=sort
+        )
+        return report, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    if kind == 'slow':
+        return jsonify({"slowest_requests": runtime_profiler.slow_report()}), 200
+    return jsonify({"error": f"Unknown profile kind: {kind}"}), 400
+
 
 if __name__ == '__main__':
+    start_warm_up()
     app.run(debug=True, port=3000)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Backend modules are imported flat (from event import Event), as server.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# Skips google-auth's slow metadata-server probe when importing server.py
+os.environ.setdefault('NO_GCE_CHECK', 'True')
+# Endpoint tests aren't about rate limits; test_admission_control builds its own controller
+os.environ.setdefault('ADMISSION_ENABLED', '0')
@@ -0,0 +1,142 @@
+import types
+
+import pytest
+from flask import Flask
+
+import AdmissionControl
+from AdmissionControl import AdmissionController, InMemoryBucketStore, RedisBucketStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(AdmissionControl, 'time', types.SimpleNamespace(
+        monotonic=lambda: clock.now, time=lambda: clock.now))
+    return clock
+
+
+def test_bucket_refills_at_rate_up_to_capacity(clock):
+    store = InMemoryBucketStore()
+
+    assert store.consume('ip:a', 4, rate=1.0, capacity=4) == (True, 0.0)
+    allowed, retry_after = store.consume('ip:a', 3, rate=1.0, capacity=4)
+    assert not allowed and retry_after == pytest.approx(3.0)
+
+    clock.advance(2)
+    allowed, retry_after = store.consume('ip:a', 3, rate=1.0, capacity=4)
+    assert not allowed and retry_after == pytest.approx(1.0)
+
+    clock.advance(100)
+    # Refill stops at capacity, so a long idle spell doesn't bank extra tokens
+    assert store.consume('ip:a', 4, rate=1.0, capacity=4)[0]
+    assert not store.consume('ip:a', 1, rate=1.0, capacity=4)[0]
+
+
+def test_buckets_are_per_client(clock):
+    store = InMemoryBucketStore()
+
+    assert store.consume('ip:a', 2, rate=1.0, capacity=2)[0]
+    assert not store.consume('ip:a', 1, rate=1.0, capacity=2)[0]
+    assert store.consume('ip:b', 2, rate=1.0, capacity=2)[0]
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    store = InMemoryBucketStore(max_buckets=2)
+
+    store.consume('ip:a', 2, rate=1.0, capacity=2)
+    store.consume('ip:b', 2, rate=1.0, capacity=2)
+    store.consume('ip:a', 0, rate=1.0, capacity=2)
+    store.consume('ip:c', 2, rate=1.0, capacity=2)
+
+    # b was touched least recently, so it was dropped and starts over full; a kept its empty bucket
+    assert not store.consume('ip:a', 1, rate=1.0, capacity=2)[0]
+    assert store.consume('ip:b', 2, rate=1.0, capacity=2)[0]
+
+
+def test_slots_are_capped_and_released():
+    store = InMemoryBucketStore()
+
+    first = store.acquire_slot('ocr', 1)
+    assert first is not None
+    assert store.acquire_slot('ocr', 1) is None
+    store.release_slot('ocr', first)
+    assert store.acquire_slot('ocr', 1) is not None
+
+
+def test_rejection_carries_retry_after_header(clock):
+    app = Flask(__name__)
+    controller = AdmissionController(InMemoryBucketStore(), rate=0.5, capacity=2.0)
+    app.before_request(controller.before_request)
+    app.teardown_request(controller.teardown_request)
+
+    @app.route('/api/redate', methods=['POST'])
+    def redate():
+        return 'ok'
+
+    client = app.test_client()
+    assert client.post('/api/redate').status_code == 200
+    assert client.post('/api/redate').status_code == 200
+
+    response = client.post('/api/redate')
+    assert response.status_code == 429
+    # One token short at half a token per second
+    assert response.headers['Retry-After'] == '2'
+    assert controller.rejections['rate'] == 1
+
+    clock.advance(2)
+    assert client.post('/api/redate').status_code == 200
+
+
+def test_redis_scripts_refill_and_cap_slots(clock):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    store = RedisBucketStore(client=fakeredis.FakeRedis())
+
+    assert store.consume('ip:a', 4, 1.0, 4) == (True, 0.0)
+    allowed, retry_after = store.consume('ip:a', 3, 1.0, 4)
+    assert not allowed and retry_after == pytest.approx(3.0)
+    clock.advance(3)
+    assert store.consume('ip:a', 3, 1.0, 4)[0]
+
+    first = store.acquire_slot('ocr', 1)
+    assert first is not None
+    assert store.acquire_slot('ocr', 1) is None
+    store.release_slot('ocr', first)
+    second = store.acquire_slot('ocr', 1)
+    assert second is not None
+
+    # A slot whose holder never released it expires after the lease
+    clock.advance(store.slot_lease + 1)
+    assert store.acquire_slot('ocr', 1) is not None
+
+
+def test_redis_outage_falls_back_to_per_process_limits(clock):
+    redis = pytest.importorskip('redis')
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+    # Nothing listens on port 1, so every call raises ConnectionError
+    client = redis.Redis(port=1, socket_connect_timeout=0.1, retry=Retry(NoBackoff(), 0))
+    store = RedisBucketStore(client=client)
+
+    assert store.consume('ip:a', 2, 1.0, 2) == (True, 0.0)
+    assert not store.consume('ip:a', 1, 1.0, 2)[0]
+    assert store.degraded
+
+    token = store.acquire_slot('ocr', 1)
+    assert token is not None
+    assert store.acquire_slot('ocr', 1) is None
+    store.release_slot('ocr', token)
+    assert store.acquire_slot('ocr', 1) is not None
+
+    # Redis isn't tried again until the retry interval has passed
+    clock.advance(store.retry_interval + 1)
+    assert store.consume('ip:a', 1, 1.0, 2)[0]
+    assert store.degraded
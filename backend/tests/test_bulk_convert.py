@@ -0,0 +1,24 @@
+import pytest
+
+import bulk_convert
+
+
+def test_inputs_sharing_a_stem_are_rejected_before_converting(tmp_path, capsys):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    for name in ('week1.png', 'week1.json', 'week2.png', 'Week2.JPG', 'notes.txt'):
+        (input_dir / name).write_bytes(b'')
+
+    with pytest.raises(SystemExit) as exit_info:
+        bulk_convert.main([str(input_dir), str(output_dir)])
+
+    assert exit_info.value.code == 2
+    error = capsys.readouterr().err
+    assert 'week1.json, week1.png' in error
+    assert 'Week2.JPG, week2.png' in error
+    assert 'notes.txt' not in error
+    assert not output_dir.exists()
+
+
+def test_distinct_stems_do_not_collide():
+    assert bulk_convert.find_output_collisions(['week1.png', 'week2.json', 'week1.png.json']) == []
@@ -0,0 +1,47 @@
+from flask import Flask, request
+
+from CalendarFeed import CalendarFeed
+
+
+def make_feed(max_entries):
+    renders = []
+
+    def render(session_id):
+        renders.append(session_id)
+        return f"BEGIN:VCALENDAR\r\nX-SESSION:{session_id}\r\nEND:VCALENDAR\r\n"
+
+    return CalendarFeed(render, max_entries=max_entries), renders
+
+
+def poll(feed, token, session_id, headers=None):
+    app = Flask(__name__)
+    with app.test_request_context(headers=headers or {}):
+        return feed.make_response(token, session_id, request)
+
+
+def test_feeds_are_rendered_once_and_revalidate_with_304():
+    feed, renders = make_feed(max_entries=4)
+
+    first = poll(feed, 'tok', 'session-a')
+    etag = first.headers['ETag']
+    second = poll(feed, 'tok', 'session-a', {'If-None-Match': etag})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert renders == ['session-a']
+
+
+def test_least_recently_polled_feed_is_evicted():
+    feed, renders = make_feed(max_entries=2)
+
+    poll(feed, 'a', 'session-a')
+    poll(feed, 'b', 'session-b')
+    poll(feed, 'a', 'session-a')
+    poll(feed, 'c', 'session-c')
+
+    assert len(feed._cache) == 2 and len(feed._render_locks) == 2
+    assert feed.evictions == 1
+    poll(feed, 'a', 'session-a')
+    assert renders == ['session-a', 'session-b', 'session-c']
+    poll(feed, 'b', 'session-b')
+    assert renders[-1] == 'session-b' and len(renders) == 4
@@ -0,0 +1,31 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client():
+    server.app.config['TESTING'] = True
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize('session_ids', [
+    [],
+    'abc123',
+    {'id': 'abc123'},
+    [['abc123']],
+    [{'id': 'abc123'}],
+    [1, 2],
+])
+def test_freebusy_rejects_anything_but_a_list_of_strings(client, session_ids):
+    response = client.post('/api/freebusy', json={'session_ids': session_ids})
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_freebusy_unknown_sessions_are_not_found(client):
+    response = client.post('/api/freebusy', json={'session_ids': ['no-such-session']})
+
+    assert response.status_code == 404
+    assert response.get_json()['missing_session_ids'] == ['no-such-session']
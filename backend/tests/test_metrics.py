@@ -0,0 +1,25 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(server, 'vision_client', None)
+    server.app.config['TESTING'] = True
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'wrong'}])
+def test_metrics_are_hidden_without_the_admin_token(client, headers):
+    assert client.get('/api/metrics', headers=headers).status_code == 404
+
+
+def test_metrics_report_a_missing_vision_client_as_absent(client):
+    response = client.get('/api/metrics', headers={'X-Admin-Token': 'secret'})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['vision'] is None
+    assert 'entries' in body['template_cache']
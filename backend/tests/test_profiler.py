@@ -0,0 +1,36 @@
+import tracemalloc
+
+import pytest
+
+from Profiler import RuntimeProfiler
+
+
+@pytest.fixture
+def tracing():
+    # Tracing started by someone other than start_memory(), as with PYTHONTRACEMALLOC
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def test_memory_report_without_start_memory_takes_a_baseline(tracing):
+    profiler = RuntimeProfiler()
+
+    first = profiler.memory_report()
+    kept = [bytearray(100000) for _ in range(5)]
+    second = profiler.memory_report()
+
+    assert first['tracing'] is True
+    assert second['top_growth'] and second['top_growth'][0]['size_diff_bytes'] > 0
+    assert len(kept) == 5
+
+
+def test_memory_report_never_lists_tracemalloc_or_importlib_frames(tracing):
+    profiler = RuntimeProfiler()
+    profiler.start_memory()
+
+    report = profiler.memory_report(limit=1000)
+
+    for stat in report['top_growth']:
+        assert 'tracemalloc' not in stat['location']
+        assert 'importlib._bootstrap>' not in stat['location']
@@ -0,0 +1,79 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytz
+from google.cloud import vision
+from PIL import Image
+
+import server
+from SyntheticSchedule import LINE_SPACING, _line, synthetic_annotation
+
+
+def _as_proto(annotation):
+    return vision.TextAnnotation.from_json(json.dumps(annotation), ignore_unknown_fields=True)
+
+
+def _png(width=1000, height=1100):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _clock(value):
+    return f"{(value.hour - 1) % 12 + 1}:{value.minute:02d}"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, 'vision_client', object())
+    return server.app.test_client()
+
+
+def test_region_reocr_after_edit_replaces_the_misread_event(client, monkeypatch):
+    monkeypatch.setattr(server.ocr_service_instance, 'process_image',
+                        lambda content: _as_proto(synthetic_annotation(seed=7)))
+    converted = client.post('/api/convert-schedule', data={
+        'image': (io.BytesIO(_png()), 'schedule.png'), 'startDate': '2025-08-25', 'numberOfWeeks': '2'
+    }).get_json()
+    events = converted['events']
+    assert all(event['sourceBbox'] for event in events)
+
+    # Pick a morning class short enough that a corrected time an hour later doesn't overlap it
+    def duration(event):
+        return datetime.fromisoformat(event['endTime']) - datetime.fromisoformat(event['startTime'])
+    misread = next(e for e in events
+                   if 8 <= datetime.fromisoformat(e['startTime']).hour <= 10 and duration(e) <= timedelta(hours=1))
+
+    # The editor sends everything back as UTC (toISOString) together with sourceBbox
+    local_tz = pytz.timezone('America/New_York')
+    def to_utc(value):
+        return local_tz.localize(datetime.fromisoformat(value)).astimezone(timezone.utc).isoformat()
+    edited = [dict(event, startTime=to_utc(event['startTime']), endTime=to_utc(event['endTime'])) for event in events]
+    session_id = client.post('/api/update-events', json={
+        'events': edited, 'original_session_id': converted['session_id']
+    }).get_json()['session_id']
+
+    # Re-OCR the misread block; this time Vision reads it an hour later
+    min_x, max_x, min_y, max_y = misread['sourceBbox']
+    x, y = int(min_x) - 5, int(min_y) - 5
+    corrected_start = datetime.fromisoformat(misread['startTime']) + timedelta(hours=1)
+    corrected_end = corrected_start + duration(misread)
+    words = (_line(misread['name'], 5, 5)
+             + _line(f"{_clock(corrected_start)} - {_clock(corrected_end)}", 5, 5 + LINE_SPACING)
+             + _line(misread['location'], 5, 5 + 2 * LINE_SPACING))
+    region_annotation = {'pages': [{'blocks': [{'paragraphs': [{'words': words}]}]}], 'text': ''}
+    monkeypatch.setattr(server.ocr_service_instance, 'process_image', lambda content: _as_proto(region_annotation))
+
+    response = client.post('/api/reocr-region', data={
+        'session_id': session_id, 'x': x, 'y': y,
+        'width': int(max_x - min_x) + 10, 'height': int(max_y - min_y) + 10
+    })
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['replaced'] == 1
+    assert len(result['events']) == len(events)
+    named = [event for event in result['events'] if event['name'] == misread['name']]
+    assert [datetime.fromisoformat(event['startTime']) for event in named] == [corrected_start]
@@ -0,0 +1,124 @@
+from datetime import date, datetime, time, timedelta
+
+import pytz
+
+from event import Event
+from ScheduleAnalyzer import ScheduleAnalyzer
+
+analyzer = ScheduleAnalyzer('America/New_York')
+
+
+def event(name, start, end):
+    return Event(name, start, end)
+
+
+def names(conflicts):
+    return sorted(tuple(sorted((a.name, b.name))) for a, b in conflicts)
+
+
+def test_conflicts_are_found_for_every_overlapping_pair():
+    events = [
+        event('long', datetime(2025, 9, 1, 9), datetime(2025, 9, 1, 12)),
+        event('inside', datetime(2025, 9, 1, 10), datetime(2025, 9, 1, 11)),
+        event('tail', datetime(2025, 9, 1, 10, 30), datetime(2025, 9, 1, 13)),
+        event('later', datetime(2025, 9, 1, 14), datetime(2025, 9, 1, 15)),
+    ]
+
+    assert names(analyzer.find_conflicts(events)) == [('inside', 'long'), ('inside', 'tail'), ('long', 'tail')]
+
+
+def test_back_to_back_and_empty_events_do_not_conflict():
+    events = [
+        event('first', datetime(2025, 9, 1, 9), datetime(2025, 9, 1, 10)),
+        event('second', datetime(2025, 9, 1, 10), datetime(2025, 9, 1, 11)),
+        event('zero', datetime(2025, 9, 1, 9, 30), datetime(2025, 9, 1, 9, 30)),
+    ]
+
+    assert analyzer.find_conflicts(events) == []
+
+
+def test_utc_and_local_events_conflict_on_the_same_wall_clock_across_dst():
+    # 9:00 New York time is 14:00 UTC before the March change and 13:00 UTC after it
+    for day, utc_hour in ((date(2025, 3, 7), 14), (date(2025, 3, 10), 13)):
+        local = event('local', datetime.combine(day, time(9)), datetime.combine(day, time(10)))
+        edited = event('edited', datetime.combine(day, time(utc_hour), tzinfo=pytz.utc),
+                       datetime.combine(day, time(utc_hour + 1), tzinfo=pytz.utc))
+
+        assert names(analyzer.find_conflicts([local, edited])) == [('edited', 'local')]
+
+
+def test_merge_busy_unions_overlapping_and_touching_blocks():
+    mine = [event('a', datetime(2025, 9, 1, 9), datetime(2025, 9, 1, 10))]
+    theirs = [
+        event('b', datetime(2025, 9, 1, 10), datetime(2025, 9, 1, 11)),
+        event('c', datetime(2025, 9, 1, 10, 30), datetime(2025, 9, 1, 10, 45)),
+        event('d', datetime(2025, 9, 1, 13), datetime(2025, 9, 1, 14)),
+    ]
+
+    assert analyzer.merge_busy([mine, theirs]) == [
+        (datetime(2025, 9, 1, 9), datetime(2025, 9, 1, 11)),
+        (datetime(2025, 9, 1, 13), datetime(2025, 9, 1, 14)),
+    ]
+
+
+def test_free_slots_skip_gaps_shorter_than_the_minimum():
+    busy = [
+        (datetime(2025, 9, 1, 9), datetime(2025, 9, 1, 10)),
+        (datetime(2025, 9, 1, 10, 20), datetime(2025, 9, 1, 12)),
+    ]
+
+    free = analyzer.free_slots(busy, date(2025, 9, 1), date(2025, 9, 1), time(8), time(13), timedelta(minutes=30))
+
+    assert free == [
+        (datetime(2025, 9, 1, 8), datetime(2025, 9, 1, 9)),
+        (datetime(2025, 9, 1, 12), datetime(2025, 9, 1, 13)),
+    ]
+
+
+def test_block_crossing_midnight_only_blocks_the_hours_it_covers():
+    busy = [(datetime(2025, 9, 1, 22), datetime(2025, 9, 2, 2))]
+
+    free = analyzer.free_slots(busy, date(2025, 9, 1), date(2025, 9, 2), time(0), time(23, 59), timedelta(minutes=30))
+
+    assert free == [
+        (datetime(2025, 9, 1, 0), datetime(2025, 9, 1, 22)),
+        (datetime(2025, 9, 2, 2), datetime(2025, 9, 2, 23, 59)),
+    ]
+
+
+def test_block_spanning_whole_days_leaves_them_without_free_time():
+    busy = [(datetime(2025, 9, 1, 12), datetime(2025, 9, 3, 9))]
+
+    free = analyzer.free_slots(busy, date(2025, 9, 1), date(2025, 9, 3), time(8), time(22), timedelta(minutes=30))
+
+    assert free == [
+        (datetime(2025, 9, 1, 8), datetime(2025, 9, 1, 12)),
+        (datetime(2025, 9, 3, 9), datetime(2025, 9, 3, 22)),
+    ]
+
+
+def test_dst_days_keep_wall_clock_day_bounds():
+    # Clocks jump 2:00 -> 3:00 on 2025-03-09 and 2:00 -> 1:00 on 2025-11-02 in New York
+    for day in (date(2025, 3, 9), date(2025, 11, 2)):
+        busy = [(datetime.combine(day, time(12)), datetime.combine(day, time(13)))]
+
+        free = analyzer.free_slots(busy, day, day, time(8), time(22), timedelta(minutes=30))
+
+        assert free == [
+            (datetime.combine(day, time(8)), datetime.combine(day, time(12))),
+            (datetime.combine(day, time(13)), datetime.combine(day, time(22))),
+        ]
+
+
+def test_edited_utc_event_blocks_local_hours_on_a_dst_day():
+    # 14:00 UTC on the day clocks spring forward is 10:00 EDT
+    edited = event('edited', datetime(2025, 3, 9, 14, tzinfo=pytz.utc), datetime(2025, 3, 9, 15, tzinfo=pytz.utc))
+    busy = analyzer.merge_busy([[edited]])
+
+    free = analyzer.free_slots(busy, date(2025, 3, 9), date(2025, 3, 9), time(8), time(12), timedelta(minutes=30))
+
+    assert busy == [(datetime(2025, 3, 9, 10), datetime(2025, 3, 9, 11))]
+    assert free == [
+        (datetime(2025, 3, 9, 8), datetime(2025, 3, 9, 10)),
+        (datetime(2025, 3, 9, 11), datetime(2025, 3, 9, 12)),
+    ]
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from SingleFlight import SingleFlight, SingleFlightTimeout
+
+
+def start_leader(flight, key, fn):
+    """Runs flight.do(key, fn) on a thread; returns the thread and a dict it fills with the outcome."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = flight.do(key, fn)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.001)
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        entered.set()
+        release.wait(5)
+        return 'parsed'
+
+    leader, outcome = start_leader(flight, 'img', work)
+    assert entered.wait(5)
+    followers = [start_leader(flight, 'img', work) for _ in range(3)]
+    # Followers register before they block, so wait until all three are counted
+    wait_until(lambda: flight.metrics()['followers'] == 3)
+    release.set()
+    leader.join(5)
+    for thread, _ in followers:
+        thread.join(5)
+
+    assert outcome['result'] == ('parsed', False)
+    assert [follower_outcome['result'] for _, follower_outcome in followers] == [('parsed', True)] * 3
+    assert calls == [1]
+    assert flight.metrics() == {'leaders': 1, 'followers': 3, 'timeouts': 0, 'errors': 0, 'in_flight': 0}
+
+
+def test_leader_failure_propagates_to_waiters_and_is_not_kept():
+    flight = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+
+    def failing():
+        entered.set()
+        release.wait(5)
+        raise ValueError('vision exploded')
+
+    leader, leader_outcome = start_leader(flight, 'img', failing)
+    assert entered.wait(5)
+    follower, follower_outcome = start_leader(flight, 'img', failing)
+    wait_until(lambda: flight.metrics()['followers'] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(leader_outcome['error'], ValueError)
+    assert follower_outcome['error'] is leader_outcome['error']
+    assert flight.metrics()['errors'] == 1
+    # A failure isn't cached: the next caller runs the work again
+    assert flight.do('img', lambda: 'retried') == ('retried', False)
+
+
+def test_waiter_times_out_while_the_leader_keeps_going():
+    flight = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+
+    def slow():
+        entered.set()
+        release.wait(5)
+        return 'late'
+
+    leader, outcome = start_leader(flight, 'img', slow)
+    assert entered.wait(5)
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('img', slow, timeout=0.05)
+
+    release.set()
+    leader.join(5)
+    assert outcome['result'] == ('late', False)
+    assert flight.metrics()['timeouts'] == 1
+    assert flight.metrics()['in_flight'] == 0
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.metrics()['leaders'] == 2
@@ -0,0 +1,53 @@
+from datetime import date, datetime, time, timezone
+
+from event import Event, WeeklyEvent, date_weekly_events
+
+
+def test_parsed_template_dates_to_first_occurrence_on_or_after_start():
+    template = [
+        WeeklyEvent(0, time(10, 10), time(11, 5), 'CS 1'),
+        WeeklyEvent(2, time(13, 25), time(14, 20), 'CS 2'),
+    ]
+
+    events = date_weekly_events(template, date(2025, 8, 27))  # a Wednesday
+
+    assert [(e.name, e.start_time) for e in events] == [
+        ('CS 1', datetime(2025, 9, 1, 10, 10)),
+        ('CS 2', datetime(2025, 8, 27, 13, 25)),
+    ]
+
+
+def test_meetings_after_the_end_date_are_left_out():
+    template = [WeeklyEvent(4, time(9), time(10), 'Friday class')]
+
+    assert date_weekly_events(template, date(2025, 8, 25), date(2025, 8, 27)) == []
+
+
+def test_end_before_start_rolls_over_to_next_day():
+    event = WeeklyEvent(0, time(22), time(1), 'Night lab').on(date(2025, 9, 1))
+
+    assert event.end_time == datetime(2025, 9, 2, 1)
+
+
+def test_edited_utc_event_keeps_local_time_across_dst():
+    # 10:10-11:05 EDT on Monday 2025-09-01, as the editor sends it
+    edited = Event('CS 1', datetime(2025, 9, 1, 14, 10, tzinfo=timezone.utc),
+                   datetime(2025, 9, 1, 15, 5, tzinfo=timezone.utc))
+
+    [event] = date_weekly_events([WeeklyEvent.from_event(edited)], date(2026, 1, 12))
+
+    assert event.start_time.replace(tzinfo=None) == datetime(2026, 1, 12, 10, 10)
+    assert event.start_time.astimezone(timezone.utc) == datetime(2026, 1, 12, 15, 10, tzinfo=timezone.utc)
+    assert event.end_time.replace(tzinfo=None) == datetime(2026, 1, 12, 11, 5)
+
+
+def test_edited_late_evening_event_keeps_local_weekday():
+    # Monday 21:30 EDT is already Tuesday in UTC
+    edited = Event('Evening', datetime(2025, 9, 2, 1, 30, tzinfo=timezone.utc),
+                   datetime(2025, 9, 2, 2, 45, tzinfo=timezone.utc))
+
+    weekly = WeeklyEvent.from_event(edited)
+    [event] = date_weekly_events([weekly], date(2026, 1, 12))
+
+    assert weekly.weekday == 0
+    assert event.start_time.replace(tzinfo=None) == datetime(2026, 1, 12, 21, 30)